@@ -5,3 +5,18 @@ REQUEST_TIMEOUT_S = int(os.getenv("REQUEST_TIMEOUT_S", "300"))
 STREAM_REQUEST_TIMEOUT_S = int(os.getenv("STREAM_REQUEST_TIMEOUT_S", "1200"))
 STREAM_SEGMENT_CHARS = int(os.getenv("STREAM_SEGMENT_CHARS", "420"))
 MODEL_IDLE_TIMEOUT_S = int(os.getenv("MODEL_IDLE_TIMEOUT_S", "3600"))
+AUDIO_POOL_BUFFERS = int(os.getenv("AUDIO_POOL_BUFFERS", "16"))
+AUDIO_POOL_MAX_SAMPLES = int(os.getenv("AUDIO_POOL_MAX_SAMPLES", str(16000 * 30)))
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "0"))  # 0 = size from GPU count
+TTS_BATCH_MAX_SIZE = int(os.getenv("TTS_BATCH_MAX_SIZE", "8"))
+TTS_BATCH_MAX_WAIT_MS = int(os.getenv("TTS_BATCH_MAX_WAIT_MS", "15"))
+WHISPER_BATCH_MAX_SIZE = int(os.getenv("WHISPER_BATCH_MAX_SIZE", "8"))
+WHISPER_BATCH_MAX_WAIT_MS = int(os.getenv("WHISPER_BATCH_MAX_WAIT_MS", "20"))
+TORCH_COMPILE = os.getenv("TORCH_COMPILE", "0") == "1"
+QUANTIZE_TTS = os.getenv("QUANTIZE_TTS", "0") == "1"
+TTS_COMPILE = os.getenv("TTS_COMPILE", "0") == "1"
+TTS_PREFETCH = os.getenv("TTS_PREFETCH", "1") == "1"
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "0") == "1"
+_WARMUP = os.getenv("TTS_STUDIO_WARMUP")
+WARMUP_ON_LOAD = None if _WARMUP is None else _WARMUP == "1"  # Unset = only on CUDA
+WHISPER_BACKEND = os.getenv("WHISPER_BACKEND", "transformers")  # or "faster-whisper"
@@ -7,20 +7,28 @@ Supports three modes: Voice Design, Voice Clone, and Custom Voice.
 
 import os
 import io
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from typing import Optional
 
+import anyio.to_thread
 import torch
 import soundfile as sf
 import numpy as np
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response, JSONResponse
+from fastapi.responses import Response, ORJSONResponse
 
+from app.config import PRELOAD_MODELS, THREADPOOL_SIZE, TORCH_COMPILE
 from app.routers import voice_design, voice_clone, custom_voice, status, transcription
+from app.services.batcher import tts_batcher
 from app.services.tts_manager import tts_manager
 from app.services.transcription_manager import transcription_manager
+from app.utils import audio_stats
+from app.utils.buffer_pool import float32_pool
+from app.utils.device import HAS_CUDA, HAS_MPS, HAS_ROCM
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -32,21 +40,47 @@ async def lifespan(app: FastAPI):
     """Application lifespan handler for startup and shutdown."""
     logger.info("Starting Qwen3-TTS API Server...")
     
+    # Let fp32 matmuls use TF32 (CUDA) or bf16 (oneDNN on CPU) internally
+    torch.set_float32_matmul_precision("high")
+    
     # Log device info
-    if torch.cuda.is_available():
+    if HAS_CUDA:
         device = torch.cuda.get_device_name(0)
-        logger.info(f"CUDA available: {device}")
-    elif hasattr(torch.backends, 'mps') and torch.backends.mps.is_available():
+        if HAS_ROCM:
+            logger.info(f"ROCm (AMD GPU) available: {device}")
+        else:
+            logger.info(f"CUDA available: {device}")
+        # Input shapes vary per request so skip cuDNN autotune
+        torch.backends.cudnn.benchmark = False
+    elif HAS_MPS:
         logger.info("Apple Silicon GPU (MPS) available")
-    elif hasattr(torch, 'hip') and torch.hip.is_available():
-        logger.info("ROCm (AMD GPU) available")
     else:
         logger.warning("No GPU detected, using CPU (will be slower)")
     
+    # Size the worker threadpool: two inference threads per GPU plus a few for I/O.
+    # This is the loop's default executor, which asyncio.to_thread (and so
+    # run_inference) uses; Starlette's own anyio pool is left at its default.
+    gpu_count = torch.cuda.device_count() if HAS_CUDA else 0
+    pool_size = THREADPOOL_SIZE or max(gpu_count, 1) * 2 + 4
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="worker")
+    )
+    logger.info(f"Worker threadpool size: {pool_size}")
+    
+    # Preallocate scratch buffers for transcription preprocessing
+    float32_pool.preallocate()
+    audio_stats.warmup()
+    
+    # Load (and, with TORCH_COMPILE, compile) Whisper at startup rather than on
+    # the first request; loading also warms it up on CUDA (TTS_STUDIO_WARMUP=0/1 overrides)
+    if PRELOAD_MODELS or TORCH_COMPILE:
+        await anyio.to_thread.run_sync(transcription_manager._get_model)
+    
     yield
     
     # Cleanup on shutdown
     logger.info("Shutting down Qwen3-TTS API Server...")
+    tts_batcher.shutdown()
     tts_manager.shutdown()
     transcription_manager.shutdown()
 
@@ -56,6 +90,7 @@ app = FastAPI(
     description="Premium Text-to-Speech API with Voice Design, Voice Clone, and Custom Voice modes",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS middleware for frontend - permissive for development
@@ -76,7 +111,7 @@ app.add_middleware(
 async def global_exception_handler(request: Request, exc: Exception):
     """Global exception handler for unhandled errors."""
     logger.exception(f"Unhandled error: {exc}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={"detail": str(exc)},
     )
@@ -85,10 +120,9 @@ async def global_exception_handler(request: Request, exc: Exception):
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint."""
-    gpu_available = torch.cuda.is_available() or (hasattr(torch, 'hip') and torch.hip.is_available())
     return {
         "status": "healthy",
-        "gpu_available": gpu_available,
+        "gpu_available": HAS_CUDA or HAS_ROCM,
         "loaded_models": list(tts_manager._models.keys()) if hasattr(tts_manager, '_models') else [],
     }
 
@@ -139,5 +173,17 @@ app.include_router(transcription.router, prefix="/api", tags=["Transcription"])
 
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Each worker loads its own models (CUDA state can't be shared), so keep
+    # WEB_CONCURRENCY at 1 unless the GPU has room for several copies.
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",  # uvloop has no Windows support
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+        log_level="info",
+        access_log=False,  # Routers already log each request
+    )
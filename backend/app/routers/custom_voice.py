@@ -1,19 +1,21 @@
 """Custom Voice API router."""
 
+import asyncio
 import base64
-import io
 import json
 import logging
+from functools import partial
 from typing import AsyncGenerator
 
-import soundfile as sf
 from fastapi import APIRouter, HTTPException, Request
-from fastapi.responses import Response, StreamingResponse
+from fastapi.responses import StreamingResponse
 
 from app.config import STREAM_REQUEST_TIMEOUT_S, STREAM_SEGMENT_CHARS
 from app.models import CustomVoiceRequest
+from app.services.batcher import tts_batcher
 from app.services.tts_manager import tts_manager
-from app.utils.inference import run_inference
+from app.utils.audio import audio_to_wav_bytes, wav_stream, wav_stream_size
+from app.utils.inference import iter_prefetched, run_inference
 from app.utils.text import split_text
 
 logger = logging.getLogger(__name__)
@@ -21,10 +23,11 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 # Valid speakers
-VALID_SPEAKERS = {
+VALID_SPEAKERS: frozenset[str] = frozenset({
     "Aiden", "Dylan", "Eric", "Ono_anna", "Ryan",
     "Serena", "Sohee", "Uncle_fu", "Vivian"
-}
+})
+_SPEAKERS_MSG = f"Invalid speaker. Must be one of: {', '.join(sorted(VALID_SPEAKERS))}"
 
 
 @router.post("/custom-voice")
@@ -36,40 +39,31 @@ async def generate_custom_voice(request: CustomVoiceRequest):
     """
     try:
         logger.info(
-            f"Custom Voice request: text={request.text[:50]}..., "
-            f"speaker={request.speaker}, lang={request.language}, model={request.model_size}"
+            "Custom Voice request: text=%s..., speaker=%s, lang=%s, model=%s",
+            request.text[:50],
+            request.speaker,
+            request.language,
+            request.model_size,
         )
         
         # Validate speaker
         if request.speaker not in VALID_SPEAKERS:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid speaker. Must be one of: {', '.join(sorted(VALID_SPEAKERS))}"
-            )
+            raise HTTPException(status_code=400, detail=_SPEAKERS_MSG)
         
         # Validate model size
         if request.model_size not in ("0.6B", "1.7B"):
             raise HTTPException(status_code=400, detail="Invalid model size")
         
-        audio, sr = tts_manager.generate_custom_voice(
-            text=request.text,
-            language=request.language,
-            speaker=request.speaker,
-            instruct=request.instruct,
-            model_size=request.model_size,
-        )
-        
-        # Convert to WAV bytes
-        buffer = io.BytesIO()
-        sf.write(buffer, audio, sr, format="WAV")
-        buffer.seek(0)
+        # Concurrent requests for the same model are coalesced into one forward pass
+        audio, sr = await tts_batcher.submit(f"custom_{request.model_size}", request)
         
         duration = len(audio) / sr
         
-        return Response(
-            content=buffer.read(),
+        return StreamingResponse(
+            wav_stream(audio, sr),
             media_type="audio/wav",
             headers={
+                "Content-Length": str(wav_stream_size(audio)),
                 "X-Audio-Duration": str(duration),
                 "X-Sample-Rate": str(sr),
             },
@@ -85,10 +79,7 @@ async def generate_custom_voice(request: CustomVoiceRequest):
 @router.post("/custom-voice/stream")
 async def stream_custom_voice(payload: CustomVoiceRequest, request: Request):
     if payload.speaker not in VALID_SPEAKERS:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid speaker. Must be one of: {', '.join(sorted(VALID_SPEAKERS))}",
-        )
+        raise HTTPException(status_code=400, detail=_SPEAKERS_MSG)
     if payload.model_size not in ("0.6B", "1.7B"):
         raise HTTPException(status_code=400, detail="Invalid model size")
 
@@ -96,34 +87,46 @@ async def stream_custom_voice(payload: CustomVoiceRequest, request: Request):
 
     async def event_generator() -> AsyncGenerator[str, None]:
         total = len(segments)
-        for index, segment in enumerate(segments):
-            if await request.is_disconnected():
-                break
-            try:
-                audio, sr = await run_inference(
-                    tts_manager.generate_custom_voice,
-                    text=segment,
-                    language=payload.language,
-                    speaker=payload.speaker,
-                    instruct=payload.instruct,
-                    model_size=payload.model_size,
-                    timeout=STREAM_REQUEST_TIMEOUT_S,
-                )
-                buffer = io.BytesIO()
-                sf.write(buffer, audio, sr, format="WAV")
-                payload_json = json.dumps({
-                    "index": index,
-                    "total": total,
-                    "audio": base64.b64encode(buffer.getvalue()).decode("ascii"),
-                })
-                yield f"data: {payload_json}\n\n"
-            except Exception as exc:
+        jobs = [
+            partial(
+                run_inference,
+                tts_manager.generate_custom_voice,
+                text=segment,
+                language=payload.language,
+                speaker=payload.speaker,
+                instruct=payload.instruct,
+                model_size=payload.model_size,
+                timeout=STREAM_REQUEST_TIMEOUT_S,
+            )
+            for segment in segments
+        ]
+        async def still_connected() -> bool:
+            return not await request.is_disconnected()
+
+        # The next segment is generated while this one is encoded and sent,
+        # unless the client has already gone
+        results = iter_prefetched(jobs, should_continue=still_connected)
+        index = 0
+        try:
+            async for audio, sr in results:
+                wav_bytes = await asyncio.to_thread(audio_to_wav_bytes, audio, sr)
                 payload_json = json.dumps({
                     "index": index,
                     "total": total,
-                    "error": f"Generation failed: {exc}",
+                    "audio": base64.b64encode(wav_bytes).decode("ascii"),
                 })
                 yield f"data: {payload_json}\n\n"
-                break
+                index += 1
+                if await request.is_disconnected():
+                    break
+        except Exception as exc:
+            payload_json = json.dumps({
+                "index": index,
+                "total": total,
+                "error": f"Generation failed: {exc}",
+            })
+            yield f"data: {payload_json}\n\n"
+        finally:
+            await results.aclose()
 
     return StreamingResponse(event_generator(), media_type="text/event-stream")
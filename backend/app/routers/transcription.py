@@ -1,28 +1,164 @@
 """Transcription API router."""
 
+import asyncio
+import json
 import logging
-import os
-import tempfile
+import threading
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import AsyncGenerator, BinaryIO, Callable, Optional
 
 import numpy as np
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Request, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 
+from app.config import STREAM_REQUEST_TIMEOUT_S
 from app.services.transcription_manager import transcription_manager
+from app.utils import audio_stats
 from app.utils.audio import load_audio_with_fallback
+from app.utils.buffer_pool import float32_pool
+from app.utils.inference import run_blocking
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+WHISPER_SAMPLE_RATE = 16000
+
+# Resamplers keyed by source sample rate; building the sinc kernel is the
+# expensive part, so each one is constructed once and reused across requests.
+# The rate comes from the upload, so only the most recent few are kept.
+@lru_cache(maxsize=8)
+def _get_resampler(orig_freq: int):
+    """Get a cached resampler to 16kHz on the transcription device."""
+    import torch
+    import torchaudio
+
+    return torchaudio.transforms.Resample(
+        orig_freq=orig_freq,
+        new_freq=WHISPER_SAMPLE_RATE,
+        dtype=torch.float32,
+    ).to(transcription_manager._device)
+
 
 class TranscriptionResponse(BaseModel):
     """Response model for transcription endpoint."""
     text: str
 
 
+def _load_upload(audio_file: BinaryIO, suffix: str) -> tuple[np.ndarray, int]:
+    """
+    Decode and normalise uploaded audio to mono float32 (blocking).
+
+    The returned array may be a pooled buffer; pass it to float32_pool.release
+    once it is no longer needed.
+    """
+    import torch
+
+    # Decode in memory with soundfile; fallback to ffmpeg for formats like m4a.
+    audio_array, sample_rate = load_audio_with_fallback(audio_file, suffix)
+    
+    # Wrap as a torch tensor for resampling (already float32, so no copy)
+    tensor = torch.from_numpy(audio_array)
+    
+    # Handle shapes: sf.read gives (time, channels) or (time,), torchaudio wants (channels, time)
+    if len(tensor.shape) == 1:
+        tensor = tensor.unsqueeze(0)  # (time,) -> (1, time)
+    else:
+        tensor = tensor.permute(1, 0)  # (time, channels) -> (channels, time)
+    
+    # Resample to 16kHz if needed (Whisper expects 16kHz). This runs on the
+    # transcription device so only the final mono signal is copied back.
+    if sample_rate != WHISPER_SAMPLE_RATE:
+        resampler = _get_resampler(sample_rate)
+        tensor = resampler(tensor.to(transcription_manager._device))
+        sample_rate = WHISPER_SAMPLE_RATE
+    
+    if tensor.shape[1] == 0:
+        raise ValueError("Empty audio buffer")
+
+    # Get a 1D float32 host buffer that every normalisation step below can
+    # modify in place. Mono audio already on the CPU is used as-is (a view
+    # of the tensor we own); otherwise the mixdown or device-to-host copy
+    # lands directly in a pooled scratch buffer, the only copy made.
+    if tensor.shape[0] == 1 and tensor.device.type == "cpu":
+        audio_array = tensor[0].contiguous().numpy()
+    else:
+        audio_array = float32_pool.acquire(tensor.shape[1])
+        mono = torch.from_numpy(audio_array)
+        if tensor.shape[0] == 1:
+            mono.copy_(tensor[0])
+        elif tensor.device.type == "cpu":
+            torch.mean(tensor, dim=0, out=mono)
+        else:
+            mono.copy_(tensor.mean(dim=0))
+    try:
+        # One pass to zero non-finite samples and measure levels, then at most
+        # one fused scale-and-clip pass covering peak normalisation and auto-gain.
+        _, peak, rms = audio_stats.scan(audio_array)
+        scale = 1.0
+        if peak > 1.0:
+            scale = 1.0 / peak
+            rms *= scale
+
+        # Auto-gain if the signal is very quiet
+        if rms > 0 and rms < 0.01:
+            target_rms = 0.05
+            scale *= min(target_rms / rms, 10.0)
+
+        if scale != 1.0:
+            peak, rms = audio_stats.normalize_clip(audio_array, scale)
+
+        duration = audio_array.shape[0] / sample_rate
+        logger.info(
+            "Transcription audio stats: duration=%.2fs, sample_rate=%d, peak=%.4f, rms=%.4f",
+            duration,
+            sample_rate,
+            peak,
+            rms,
+        )
+    except Exception:
+        float32_pool.release(audio_array)
+        raise
+    return audio_array, sample_rate
+
+
+def _transcribe_upload(audio_file: BinaryIO, suffix: str, language: Optional[str]) -> str:
+    """Decode, normalise and transcribe uploaded audio (blocking)."""
+    audio_array, sample_rate = _load_upload(audio_file, suffix)
+    try:
+        return transcription_manager.transcribe(
+            audio=audio_array,
+            sample_rate=sample_rate,
+            language=language,
+        )
+    finally:
+        float32_pool.release(audio_array)
+
+
+def _stream_transcription(
+    audio_array: np.ndarray,
+    sample_rate: int,
+    language: Optional[str],
+    emit: Callable[[str], bool],
+) -> None:
+    """Feed transcribed pieces to ``emit`` until done or it returns False (blocking)."""
+    # The buffer is released here rather than by the caller so a timed-out
+    # request can't hand it back to the pool while decoding still reads it.
+    try:
+        for text in transcription_manager.transcribe_stream(
+            audio=audio_array,
+            sample_rate=sample_rate,
+            language=language,
+        ):
+            if not emit(text):
+                break
+    finally:
+        float32_pool.release(audio_array)
+
+
 @router.post("/transcribe", response_model=TranscriptionResponse)
 async def transcribe_audio(
     audio: UploadFile = File(...),
@@ -39,90 +175,95 @@ async def transcribe_audio(
         TranscriptionResponse with transcribed text
     """
     try:
-        logger.info(f"Transcription request: filename={audio.filename}, language={language}")
-        
-        # Read audio data
-        audio_data = await audio.read()
+        logger.info("Transcription request: filename=%s, language=%s", audio.filename, language)
         
-        # Save to temp file and read with soundfile
         suffix = Path(audio.filename or "").suffix or ".tmp"
-        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
-            tmp.write(audio_data)
-            tmp_path = tmp.name
         
-        try:
-            import torchaudio
-            import torch
-
-            # Load audio with soundfile; fallback to ffmpeg for formats like m4a.
-            audio_array, sample_rate = load_audio_with_fallback(tmp_path)
-            
-            # Convert to torch tensor for resampling
-            tensor = torch.from_numpy(audio_array).float()
-            
-            # Handle shapes: sf.read gives (time, channels) or (time,), torchaudio wants (channels, time)
-            if len(tensor.shape) == 1:
-                tensor = tensor.unsqueeze(0)  # (time,) -> (1, time)
-            else:
-                tensor = tensor.permute(1, 0)  # (time, channels) -> (channels, time)
-            
-            # Resample to 16kHz if needed (Whisper expects 16kHz)
-            if sample_rate != 16000:
-                resampler = torchaudio.transforms.Resample(orig_freq=sample_rate, new_freq=16000)
-                tensor = resampler(tensor)
-                sample_rate = 16000
-            
-            # Convert to mono if stereo check shape (channels, time)
-            if tensor.shape[0] > 1:
-                tensor = torch.mean(tensor, dim=0, keepdim=True)
-            
-            # Convert to numpy array (1D)
-            audio_array = tensor.squeeze().numpy().astype(np.float32, copy=False)
-            if audio_array.size == 0:
-                raise ValueError("Empty audio buffer")
-
-            # Clean up any non-finite values and normalize if needed
-            if not np.isfinite(audio_array).all():
-                audio_array = np.nan_to_num(audio_array)
-            peak = float(np.max(np.abs(audio_array)))
-            rms = float(np.sqrt(np.mean(np.square(audio_array))))
-            if peak > 1.0:
-                audio_array = audio_array / peak
-                peak = float(np.max(np.abs(audio_array)))
-                rms = float(np.sqrt(np.mean(np.square(audio_array))))
-
-            # Auto-gain if the signal is very quiet
-            if rms > 0 and rms < 0.01:
-                target_rms = 0.05
-                gain = min(target_rms / rms, 10.0)
-                audio_array = np.clip(audio_array * gain, -1.0, 1.0)
-                peak = float(np.max(np.abs(audio_array)))
-                rms = float(np.sqrt(np.mean(np.square(audio_array))))
-
-            duration = audio_array.shape[0] / sample_rate
-            logger.info(
-                "Transcription audio stats: duration=%.2fs, sample_rate=%d, peak=%.4f, rms=%.4f",
-                duration,
-                sample_rate,
-                peak,
-                rms,
-            )
-            
-            # Transcribe
-            text = transcription_manager.transcribe(
-                audio=audio_array,
-                sample_rate=sample_rate,
-                language=language,
-            )
-            
-            return TranscriptionResponse(text=text)
-            
-        finally:
-            try:
-                os.unlink(tmp_path)
-            except OSError:
-                pass
-            
+        # Decode straight from the upload's spooled temp file (small uploads stay in
+        # memory, large ones are already on disk) instead of reading it into bytes.
+        # Decoding, preprocessing and inference all block, so run them off the event loop.
+        # run_blocking rather than run_inference: the transcription manager takes
+        # a concurrency slot per batched decode, so concurrent requests can batch
+        text = await run_blocking(_transcribe_upload, audio.file, suffix, language)
+        
+        return TranscriptionResponse(text=text)
+
     except Exception as e:
         logger.exception("Transcription failed")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/transcribe/stream")
+async def stream_transcription(
+    request: Request,
+    audio: UploadFile = File(...),
+    language: Optional[str] = Form(default=None),
+):
+    """
+    Transcribe an audio file, sending text over SSE as each part is decoded.
+
+    Events are ``{"index", "text"}``; a failure ends the stream with ``{"index", "error"}``.
+    """
+    logger.info("Streaming transcription request: filename=%s, language=%s", audio.filename, language)
+    suffix = Path(audio.filename or "").suffix or ".tmp"
+
+    # Decode before responding; the upload is gone once the handler returns
+    try:
+        audio_array, sample_rate = await asyncio.to_thread(_load_upload, audio.file, suffix)
+    except Exception as e:
+        logger.exception("Transcription failed")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    loop = asyncio.get_running_loop()
+    pieces: asyncio.Queue[Optional[str]] = asyncio.Queue()
+    stopped = threading.Event()
+
+    def emit(text: str) -> bool:
+        loop.call_soon_threadsafe(pieces.put_nowait, text)
+        return not stopped.is_set()
+
+    def finish(job: asyncio.Future) -> None:
+        if not job.cancelled():
+            job.exception()  # Retrieved here in case the body never runs
+        pieces.put_nowait(None)  # Runs after any pieces already queued by emit
+
+    # Started here rather than in the body so the worker, which releases the
+    # pooled buffer when it finishes, runs even if the body never starts (the
+    # client goes away first); ``stopped`` then cuts the decode short.
+    # It is never cancelled: the thread can't be interrupted anyway.
+    job = asyncio.ensure_future(
+        run_blocking(
+            _stream_transcription,
+            audio_array,
+            sample_rate,
+            language,
+            emit,
+            timeout=STREAM_REQUEST_TIMEOUT_S,
+        )
+    )
+    job.add_done_callback(finish)
+
+    async def event_generator() -> AsyncGenerator[str, None]:
+        index = 0
+        try:
+            while (text := await pieces.get()) is not None:
+                yield f"data: {json.dumps({'index': index, 'text': text})}\n\n"
+                index += 1
+                if await request.is_disconnected():
+                    return
+            await job
+        except Exception as exc:
+            logger.exception("Streaming transcription failed")
+            payload_json = json.dumps({
+                "index": index,
+                "error": f"Transcription failed: {exc}",
+            })
+            yield f"data: {payload_json}\n\n"
+        finally:
+            stopped.set()
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        background=BackgroundTask(stopped.set),
+    )
@@ -1,22 +1,21 @@
 """Voice Clone API router."""
 
+import asyncio
 import base64
-import io
 import json
 import logging
-import tempfile
+from functools import partial
 from pathlib import Path
 from typing import AsyncGenerator, Optional
 
 import numpy as np
-import soundfile as sf
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Request
-from fastapi.responses import Response, StreamingResponse
+from fastapi.responses import StreamingResponse
 
 from app.config import STREAM_REQUEST_TIMEOUT_S, STREAM_SEGMENT_CHARS
 from app.services.tts_manager import tts_manager
-from app.utils.audio import load_audio_with_fallback
-from app.utils.inference import run_inference
+from app.utils.audio import audio_to_wav_bytes, load_audio_with_fallback, wav_stream, wav_stream_size
+from app.utils.inference import iter_prefetched, run_inference
 from app.utils.text import split_text
 
 logger = logging.getLogger(__name__)
@@ -25,45 +24,44 @@ router = APIRouter()
 
 
 def _prepare_reference_audio(ref_audio: UploadFile) -> tuple[np.ndarray, int]:
-    audio_data = ref_audio.file.read()
-
     suffix = Path(ref_audio.filename or "").suffix or ".tmp"
-    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
-        tmp.write(audio_data)
-        tmp_path = tmp.name
 
-    try:
-        ref_audio_array, ref_sr = load_audio_with_fallback(tmp_path)
+    # Decode straight from the upload's spooled temp file
+    ref_audio_array, ref_sr = load_audio_with_fallback(ref_audio.file, suffix)
 
-        if len(ref_audio_array.shape) > 1:
-            ref_audio_array = np.mean(ref_audio_array, axis=1)
+    # Mix down to mono, staying in float32 (np.mean would go through float64)
+    if ref_audio_array.ndim > 1:
+        if ref_audio_array.shape[1] == 2:
+            mono = np.empty(ref_audio_array.shape[0], dtype=np.float32)
+            np.add(ref_audio_array[:, 0], ref_audio_array[:, 1], out=mono)
+            np.multiply(mono, 0.5, out=mono)
+            ref_audio_array = mono
+        else:
+            ref_audio_array = ref_audio_array.mean(axis=1, dtype=np.float32)
 
-        ref_audio_array = ref_audio_array.astype(np.float32, copy=False)
-        if ref_audio_array.size == 0:
-            raise ValueError("Empty reference audio buffer")
-        if not np.isfinite(ref_audio_array).all():
-            ref_audio_array = np.nan_to_num(ref_audio_array)
+    ref_audio_array = ref_audio_array.astype(np.float32, copy=False)
+    if ref_audio_array.size == 0:
+        raise ValueError("Empty reference audio buffer")
+    if not np.isfinite(ref_audio_array).all():
+        ref_audio_array = np.nan_to_num(ref_audio_array)
 
-        target_sr = 24000
-        if ref_sr != target_sr:
-            import torch
-            import torchaudio
+    target_sr = 24000
+    if ref_sr != target_sr:
+        import torch
+        import torchaudio
 
-            tensor = torch.from_numpy(ref_audio_array).float().unsqueeze(0)
-            resampler = torchaudio.transforms.Resample(orig_freq=ref_sr, new_freq=target_sr)
-            tensor = resampler(tensor)
-            ref_audio_array = tensor.squeeze(0).numpy().astype(np.float32, copy=False)
-            ref_sr = target_sr
+        tensor = torch.from_numpy(ref_audio_array).float().unsqueeze(0)
+        resampler = torchaudio.transforms.Resample(orig_freq=ref_sr, new_freq=target_sr)
+        tensor = resampler(tensor)
+        ref_audio_array = tensor.squeeze(0).numpy().astype(np.float32, copy=False)
+        ref_sr = target_sr
 
-        peak = float(np.max(np.abs(ref_audio_array)))
-        if peak > 1.0:
-            ref_audio_array = ref_audio_array / peak
+    peak = float(np.max(np.abs(ref_audio_array)))
+    if peak > 1.0:
+        ref_audio_array = ref_audio_array / peak
 
-        ref_audio_array = np.clip(ref_audio_array, -1.0, 1.0)
-        return ref_audio_array, ref_sr
-    finally:
-        import os
-        os.unlink(tmp_path)
+    ref_audio_array = np.clip(ref_audio_array, -1.0, 1.0)
+    return ref_audio_array, ref_sr
 
 
 @router.post("/voice-clone")
@@ -72,7 +70,7 @@ async def generate_voice_clone(
     language: str = Form(default="Auto"),
     model_size: str = Form(default="1.7B"),
     ref_text: Optional[str] = Form(default=None),
-    x_vector_only: str = Form(default="false"),
+    x_vector_only: bool = Form(default=False),
     ref_audio: UploadFile = File(...),
 ):
     """
@@ -83,46 +81,43 @@ async def generate_voice_clone(
     """
     try:
         logger.info(
-            f"Voice Clone request: text={text[:50]}..., lang={language}, "
-            f"model={model_size}, x_vector_only={x_vector_only}"
+            "Voice Clone request: text=%s..., lang=%s, model=%s, x_vector_only=%s",
+            text[:50],
+            language,
+            model_size,
+            x_vector_only,
         )
         
-        # Parse boolean
-        x_vector_only_bool = x_vector_only.lower() in ("true", "1", "yes")
-        
         # Validate model size
         if model_size not in ("0.6B", "1.7B"):
             raise HTTPException(status_code=400, detail="Invalid model size")
         
         # Validate ref_text if not x_vector_only
-        if not x_vector_only_bool and not ref_text:
+        if not x_vector_only and not ref_text:
             raise HTTPException(
                 status_code=400,
                 detail="Reference text is required unless x_vector_only is enabled"
             )
         
-        ref_audio_array, ref_sr = _prepare_reference_audio(ref_audio)
+        ref_audio_array, ref_sr = await asyncio.to_thread(_prepare_reference_audio, ref_audio)
 
-        audio, sr = tts_manager.generate_voice_clone(
+        audio, sr = await run_inference(
+            tts_manager.generate_voice_clone,
             text=text,
             language=language,
             ref_audio=(ref_audio_array, ref_sr),
             ref_text=ref_text,
-            x_vector_only=x_vector_only_bool,
+            x_vector_only=x_vector_only,
             model_size=model_size,
         )
         
-        # Convert to WAV bytes
-        buffer = io.BytesIO()
-        sf.write(buffer, audio, sr, format="WAV")
-        buffer.seek(0)
-        
         duration = len(audio) / sr
         
-        return Response(
-            content=buffer.read(),
+        return StreamingResponse(
+            wav_stream(audio, sr),
             media_type="audio/wav",
             headers={
+                "Content-Length": str(wav_stream_size(audio)),
                 "X-Audio-Duration": str(duration),
                 "X-Sample-Rate": str(sr),
             },
@@ -142,7 +137,7 @@ async def stream_voice_clone(
     language: str = Form(default="Auto"),
     model_size: str = Form(default="1.7B"),
     ref_text: Optional[str] = Form(default=None),
-    x_vector_only: str = Form(default="false"),
+    x_vector_only: bool = Form(default=False),
     ref_audio: UploadFile = File(...),
 ):
     if model_size not in ("0.6B", "1.7B"):
@@ -150,47 +145,58 @@ async def stream_voice_clone(
     if not text.strip():
         raise HTTPException(status_code=400, detail="Text cannot be empty")
 
-    x_vector_only_bool = x_vector_only.lower() in ("true", "1", "yes")
-    if not x_vector_only_bool and not ref_text:
+    if not x_vector_only and not ref_text:
         raise HTTPException(
             status_code=400,
             detail="Reference text is required unless x_vector_only is enabled",
         )
 
-    ref_audio_array, ref_sr = _prepare_reference_audio(ref_audio)
+    ref_audio_array, ref_sr = await asyncio.to_thread(_prepare_reference_audio, ref_audio)
     segments = split_text(text, STREAM_SEGMENT_CHARS) or [text]
 
     async def event_generator() -> AsyncGenerator[str, None]:
         total = len(segments)
-        for index, segment in enumerate(segments):
-            if await request.is_disconnected():
-                break
-            try:
-                audio, sr = await run_inference(
-                    tts_manager.generate_voice_clone,
-                    text=segment,
-                    language=language,
-                    ref_audio=(ref_audio_array, ref_sr),
-                    ref_text=ref_text,
-                    x_vector_only=x_vector_only_bool,
-                    model_size=model_size,
-                    timeout=STREAM_REQUEST_TIMEOUT_S,
-                )
-                buffer = io.BytesIO()
-                sf.write(buffer, audio, sr, format="WAV")
-                payload_json = json.dumps({
-                    "index": index,
-                    "total": total,
-                    "audio": base64.b64encode(buffer.getvalue()).decode("ascii"),
-                })
-                yield f"data: {payload_json}\n\n"
-            except Exception as exc:
+        jobs = [
+            partial(
+                run_inference,
+                tts_manager.generate_voice_clone,
+                text=segment,
+                language=language,
+                ref_audio=(ref_audio_array, ref_sr),
+                ref_text=ref_text,
+                x_vector_only=x_vector_only,
+                model_size=model_size,
+                timeout=STREAM_REQUEST_TIMEOUT_S,
+            )
+            for segment in segments
+        ]
+        async def still_connected() -> bool:
+            return not await request.is_disconnected()
+
+        # The next segment is generated while this one is encoded and sent,
+        # unless the client has already gone
+        results = iter_prefetched(jobs, should_continue=still_connected)
+        index = 0
+        try:
+            async for audio, sr in results:
+                wav_bytes = await asyncio.to_thread(audio_to_wav_bytes, audio, sr)
                 payload_json = json.dumps({
                     "index": index,
                     "total": total,
-                    "error": f"Generation failed: {exc}",
+                    "audio": base64.b64encode(wav_bytes).decode("ascii"),
                 })
                 yield f"data: {payload_json}\n\n"
-                break
+                index += 1
+                if await request.is_disconnected():
+                    break
+        except Exception as exc:
+            payload_json = json.dumps({
+                "index": index,
+                "total": total,
+                "error": f"Generation failed: {exc}",
+            })
+            yield f"data: {payload_json}\n\n"
+        finally:
+            await results.aclose()
 
     return StreamingResponse(event_generator(), media_type="text/event-stream")
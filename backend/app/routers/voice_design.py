@@ -1,19 +1,20 @@
 """Voice Design API router."""
 
+import asyncio
 import base64
-import io
 import json
 import logging
+from functools import partial
 from typing import AsyncGenerator
 
-import soundfile as sf
 from fastapi import APIRouter, HTTPException, Request
-from fastapi.responses import Response, StreamingResponse
+from fastapi.responses import StreamingResponse
 
 from app.config import STREAM_REQUEST_TIMEOUT_S, STREAM_SEGMENT_CHARS
 from app.models import VoiceDesignRequest
 from app.services.tts_manager import tts_manager
-from app.utils.inference import run_inference
+from app.utils.audio import audio_to_wav_bytes, wav_stream, wav_stream_size
+from app.utils.inference import iter_prefetched, run_inference
 from app.utils.text import split_text
 
 logger = logging.getLogger(__name__)
@@ -30,25 +31,22 @@ async def generate_voice_design(request: VoiceDesignRequest):
     Uses the 1.7B VoiceDesign model.
     """
     try:
-        logger.info(f"Voice Design request: text={request.text[:50]}..., lang={request.language}")
+        logger.info("Voice Design request: text=%s..., lang=%s", request.text[:50], request.language)
         
-        audio, sr = tts_manager.generate_voice_design(
+        audio, sr = await run_inference(
+            tts_manager.generate_voice_design,
             text=request.text,
             language=request.language,
             instruct=request.voice_description,
         )
         
-        # Convert to WAV bytes
-        buffer = io.BytesIO()
-        sf.write(buffer, audio, sr, format="WAV")
-        buffer.seek(0)
-        
         duration = len(audio) / sr
         
-        return Response(
-            content=buffer.read(),
+        return StreamingResponse(
+            wav_stream(audio, sr),
             media_type="audio/wav",
             headers={
+                "Content-Length": str(wav_stream_size(audio)),
                 "X-Audio-Duration": str(duration),
                 "X-Sample-Rate": str(sr),
             },
@@ -65,32 +63,44 @@ async def stream_voice_design(payload: VoiceDesignRequest, request: Request):
 
     async def event_generator() -> AsyncGenerator[str, None]:
         total = len(segments)
-        for index, segment in enumerate(segments):
-            if await request.is_disconnected():
-                break
-            try:
-                audio, sr = await run_inference(
-                    tts_manager.generate_voice_design,
-                    text=segment,
-                    language=payload.language,
-                    instruct=payload.voice_description,
-                    timeout=STREAM_REQUEST_TIMEOUT_S,
-                )
-                buffer = io.BytesIO()
-                sf.write(buffer, audio, sr, format="WAV")
-                payload_json = json.dumps({
-                    "index": index,
-                    "total": total,
-                    "audio": base64.b64encode(buffer.getvalue()).decode("ascii"),
-                })
-                yield f"data: {payload_json}\n\n"
-            except Exception as exc:
+        jobs = [
+            partial(
+                run_inference,
+                tts_manager.generate_voice_design,
+                text=segment,
+                language=payload.language,
+                instruct=payload.voice_description,
+                timeout=STREAM_REQUEST_TIMEOUT_S,
+            )
+            for segment in segments
+        ]
+        async def still_connected() -> bool:
+            return not await request.is_disconnected()
+
+        # The next segment is generated while this one is encoded and sent,
+        # unless the client has already gone
+        results = iter_prefetched(jobs, should_continue=still_connected)
+        index = 0
+        try:
+            async for audio, sr in results:
+                wav_bytes = await asyncio.to_thread(audio_to_wav_bytes, audio, sr)
                 payload_json = json.dumps({
                     "index": index,
                     "total": total,
-                    "error": f"Generation failed: {exc}",
+                    "audio": base64.b64encode(wav_bytes).decode("ascii"),
                 })
                 yield f"data: {payload_json}\n\n"
-                break
+                index += 1
+                if await request.is_disconnected():
+                    break
+        except Exception as exc:
+            payload_json = json.dumps({
+                "index": index,
+                "total": total,
+                "error": f"Generation failed: {exc}",
+            })
+            yield f"data: {payload_json}\n\n"
+        finally:
+            await results.aclose()
 
     return StreamingResponse(event_generator(), media_type="text/event-stream")
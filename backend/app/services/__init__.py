@@ -2,5 +2,6 @@
 
 from app.services.tts_manager import tts_manager
 from app.services.transcription_manager import transcription_manager
+from app.services.batcher import tts_batcher
 
-__all__ = ["tts_manager", "transcription_manager"]
+__all__ = ["tts_manager", "transcription_manager", "tts_batcher"]
@@ -0,0 +1,133 @@
+"""
+TTS Request Batcher
+
+Coalesces concurrent custom voice requests that target the same model into a
+single batched generate call. Each model key gets its own queue, drained by one
+background task that waits at most a few milliseconds for companions.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.config import TTS_BATCH_MAX_SIZE, TTS_BATCH_MAX_WAIT_MS
+from app.models import CustomVoiceRequest
+from app.services.tts_manager import tts_manager
+from app.utils.inference import run_inference
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PendingRequest:
+    """A queued request and the future its caller is awaiting."""
+    payload: CustomVoiceRequest
+    future: asyncio.Future
+
+
+class TTSBatcher:
+    """Per-model micro-batching in front of the TTS manager."""
+
+    def __init__(self, max_size: int = TTS_BATCH_MAX_SIZE, max_wait_ms: int = TTS_BATCH_MAX_WAIT_MS):
+        self._max_size = max(1, max_size)
+        self._max_wait_s = max(0, max_wait_ms) / 1000.0
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+
+    async def submit(self, model_key: str, payload: CustomVoiceRequest) -> Tuple[np.ndarray, int]:
+        """Queue a request for ``model_key`` and wait for its audio."""
+        queue = self._queues.get(model_key)
+        if queue is None:
+            queue = asyncio.Queue()
+            self._queues[model_key] = queue
+            self._workers[model_key] = asyncio.create_task(
+                self._worker(model_key, queue),
+                name=f"tts-batcher-{model_key}",
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        await queue.put(PendingRequest(payload=payload, future=future))
+        return await future
+
+    async def _gather(self, queue: asyncio.Queue) -> List[PendingRequest]:
+        """Wait for one request, then collect more until the batch is full or the window closes."""
+        loop = asyncio.get_running_loop()
+        batch = [await queue.get()]
+        deadline = loop.time() + self._max_wait_s
+        while len(batch) < self._max_size:
+            try:
+                batch.append(queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _worker(self, model_key: str, queue: asyncio.Queue):
+        """Drain the queue for one model key, one batch at a time."""
+        while True:
+            batch = await self._gather(queue)
+
+            # Group by language so each forward pass is homogeneous
+            groups: Dict[str, List[PendingRequest]] = {}
+            for item in batch:
+                if not item.future.done():  # Skip callers that already went away
+                    groups.setdefault(item.payload.language, []).append(item)
+
+            for items in groups.values():
+                await self._run_batch(model_key, items)
+
+    async def _run_batch(self, model_key: str, items: List[PendingRequest]):
+        try:
+            if len(items) == 1:
+                payload = items[0].payload
+                results = [
+                    await run_inference(
+                        tts_manager.generate_custom_voice,
+                        text=payload.text,
+                        language=payload.language,
+                        speaker=payload.speaker,
+                        instruct=payload.instruct,
+                        model_size=payload.model_size,
+                    )
+                ]
+            else:
+                logger.info("Batching %d requests for %s", len(items), model_key)
+                wavs, sr = await run_inference(
+                    tts_manager.generate_custom_voice_batch,
+                    texts=[item.payload.text for item in items],
+                    languages=[item.payload.language for item in items],
+                    speakers=[item.payload.speaker for item in items],
+                    instructs=[item.payload.instruct for item in items],
+                    model_size=items[0].payload.model_size,
+                )
+                results = [(wav, sr) for wav in wavs]
+        except Exception as exc:
+            for item in items:
+                if not item.future.done():
+                    item.future.set_exception(exc)
+            return
+
+        for item, result in zip(items, results):
+            if not item.future.done():
+                item.future.set_result(result)
+
+    def shutdown(self):
+        """Cancel all background batch workers."""
+        for task in self._workers.values():
+            task.cancel()
+        self._workers.clear()
+        self._queues.clear()
+
+
+# Global singleton instance
+tts_batcher = TTSBatcher()
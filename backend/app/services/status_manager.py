@@ -7,14 +7,19 @@ Broadcasts status messages to all connected clients.
 
 import asyncio
 import logging
+import queue as queue_mod
+import threading
 import time
 from dataclasses import dataclass
 from enum import Enum
-from typing import AsyncGenerator, Set
+from typing import AsyncGenerator, Optional, Set, Tuple
 from contextlib import asynccontextmanager
 
 logger = logging.getLogger(__name__)
 
+# An info message followed by a success this soon is sent as just the success
+COALESCE_WINDOW_S = 0.05
+
 
 class StatusType(str, Enum):
     INFO = "info"
@@ -63,6 +68,10 @@ class StatusManager:
         self._queues: Set[asyncio.Queue] = set()
         self._lock = asyncio.Lock()
         self._current_status: StatusMessage | None = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._outbox: queue_mod.SimpleQueue = queue_mod.SimpleQueue()
+        self._sender: Optional[threading.Thread] = None
+        self._sender_lock = threading.Lock()
         self._initialized = True
         logger.info("Status Manager initialized")
     
@@ -101,20 +110,72 @@ class StatusManager:
         progress: float | None = None,
     ):
         """Synchronous broadcast for use in non-async contexts."""
-        try:
-            loop = asyncio.get_running_loop()
+        self.post((status_type, message, progress))
+
+    def post(self, event: Tuple):
+        """Queue a ``(type, message[, progress])`` status event and return immediately.
+
+        Events are delivered in order by a single background thread, so callers
+        on the inference path never wait on the event loop or on SSE clients.
+        """
+        self._ensure_sender()
+        self._outbox.put(event)
+
+    def _ensure_sender(self):
+        if self._sender is not None and self._sender.is_alive():
+            return
+        with self._sender_lock:
+            if self._sender is None or not self._sender.is_alive():
+                self._sender = threading.Thread(
+                    target=self._send_loop,
+                    name="status-sender",
+                    daemon=True,
+                )
+                self._sender.start()
+
+    def _send_loop(self):
+        """Deliver queued events, folding an info + quick success into one."""
+        event = self._outbox.get()
+        while True:
+            if StatusType(event[0]) is StatusType.INFO:
+                try:
+                    following = self._outbox.get(timeout=COALESCE_WINDOW_S)
+                except queue_mod.Empty:
+                    following = None
+                if following is not None and StatusType(following[0]) is StatusType.SUCCESS:
+                    event = following  # The info is already out of date
+                else:
+                    self._deliver(event)
+                    event = following if following is not None else self._outbox.get()
+                    continue
+            self._deliver(event)
+            event = self._outbox.get()
+
+    def _deliver(self, event: Tuple):
+        status_type = StatusType(event[0])
+        message = event[1]
+        progress = event[2] if len(event) > 2 else None
+        loop = self._loop
+        if loop is not None and loop.is_running():
             asyncio.run_coroutine_threadsafe(
                 self.broadcast(message, status_type, progress),
-                loop
+                loop,
+            )
+        else:
+            # No clients have connected yet; keep it for the first subscriber
+            self._current_status = StatusMessage(
+                message=message,
+                type=status_type,
+                timestamp=time.time(),
+                progress=progress,
             )
-        except RuntimeError:
-            # No running event loop, log and skip
             logger.debug(f"Status (no loop): [{status_type.value}] {message}")
     
     @asynccontextmanager
     async def subscribe(self) -> AsyncGenerator[asyncio.Queue, None]:
         """Subscribe to status updates. Use as async context manager."""
         queue: asyncio.Queue = asyncio.Queue()
+        self._loop = asyncio.get_running_loop()
         
         async with self._lock:
             self._queues.add(queue)
@@ -6,18 +6,240 @@ Supports lazy loading and GPU acceleration.
 """
 
 import logging
+import os
+import queue
 import threading
 import time
 import gc
-from typing import Optional
+from concurrent.futures import Future
+from contextlib import contextmanager, nullcontext
+from functools import partial
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Callable, Iterator, List, Optional
 
 import torch
 import numpy as np
 
-from app.config import MODEL_IDLE_TIMEOUT_S
+from app.config import (
+    MODEL_IDLE_TIMEOUT_S,
+    TORCH_COMPILE,
+    WHISPER_BACKEND,
+    WHISPER_BATCH_MAX_SIZE,
+    WHISPER_BATCH_MAX_WAIT_MS,
+)
+from app.services.status_manager import status_manager
+from app.utils.device import DEVICE, HAS_CUDA, HAS_MPS, HAS_ROCM, SHOULD_WARMUP, detect_attn_impl, hf_dtype_kwarg
+from app.utils.inference import inference_slot
+
+try:
+    import soxr
+
+    HAS_SOXR = True
+except ImportError:
+    HAS_SOXR = False
 
 logger = logging.getLogger(__name__)
 
+WHISPER_SAMPLE_RATE = 16000
+WHISPER_MODEL_ID = "openai/whisper-base"
+
+MIN_AUDIO_S = 0.2  # Below Whisper's reliable detection floor
+SILENCE_RMS = 1e-3  # Quieter than this (after any auto-gain) is treated as silence
+STREAM_WINDOW_S = 15  # Window length for transcribe_stream
+SINGLE_WINDOW_S = 28  # Longer clips need long-form decoding past Whisper's 30s window
+# Whisper's 448-position decoder minus the forced prompt tokens (sot, lang, task, notimestamps)
+WHISPER_MAX_NEW_TOKENS = 444
+
+_LANGUAGE_CODES = {
+    "English": "en",
+    "Chinese": "zh",
+    "Japanese": "ja",
+    "Korean": "ko",
+    "German": "de",
+    "French": "fr",
+    "Russian": "ru",
+    "Portuguese": "pt",
+    "Spanish": "es",
+    "Italian": "it",
+}
+
+# Language hint -> Whisper code, keyed by Title-Case name, lowercase name and code
+_LANG_MAP = MappingProxyType({
+    **_LANGUAGE_CODES,
+    **{name.lower(): code for name, code in _LANGUAGE_CODES.items()},
+    **{code: code for code in _LANGUAGE_CODES.values()},
+})
+_KNOWN_LANG_CODES = frozenset(_LANGUAGE_CODES.values())
+
+# Decoding options shared by every transformers generate() call; the language is added per request
+_BASE_GENERATE_KWARGS = MappingProxyType({
+    "task": "transcribe",
+    "num_beams": 1,
+    "do_sample": False,
+    "use_cache": True,
+})
+
+# Duration buckets (seconds) for batching; clips past the last edge run alone
+_BATCH_BUCKET_EDGES_S = (10.0, SINGLE_WINDOW_S)
+
+# The compiled decoder is specialised per batch size, so batches are padded up
+# to one of these (powers of two, capped at the batch limit) and each is warmed up
+_COMPILED_BATCH_SIZES = tuple(sorted({
+    min(2 ** i, max(1, WHISPER_BATCH_MAX_SIZE))
+    for i in range(max(1, WHISPER_BATCH_MAX_SIZE).bit_length() + 1)
+}))
+_PAD_CLIP = np.zeros(WHISPER_SAMPLE_RATE // 10, dtype=np.float32)
+
+
+@dataclass
+class _PendingTranscription:
+    """A queued transcription and the future its caller is blocked on."""
+    audio: np.ndarray
+    sample_rate: int
+    audio_sec: float
+    lang_code: Optional[str]
+    future: Future
+
+
+@dataclass
+class _ScheduledCall:
+    """Arbitrary work to run on the batcher thread, in queue order."""
+    fn: Callable[[], object]
+    future: Future
+
+    def run(self):
+        if not self.future.set_running_or_notify_cancel():
+            return
+        try:
+            self.future.set_result(self.fn())
+        except Exception as exc:
+            self.future.set_exception(exc)
+
+
+class _BatchScheduler:
+    """Coalesces concurrent transcribe calls into batched generate() calls.
+
+    A single background thread pops the first waiting request. If nothing else
+    is queued it runs straight away, so lone callers pay no batching delay;
+    otherwise it collects up to ``max_batch`` requests within ``max_wait_ms``
+    and groups them by language and duration bucket before running each group.
+    ``call`` runs other work (such as recording CUDA graphs) on the same thread.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[List[_PendingTranscription]], List[str]],
+        max_batch: int = WHISPER_BATCH_MAX_SIZE,
+        max_wait_ms: int = WHISPER_BATCH_MAX_WAIT_MS,
+    ):
+        self._run_batch = run_batch
+        self._max_batch = max(1, max_batch)
+        self._max_wait_s = max(0, max_wait_ms) / 1000.0
+        self._queue: queue.SimpleQueue[Optional[_PendingTranscription | _ScheduledCall]] = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+
+    def submit(self, item: _PendingTranscription) -> Future:
+        self._ensure_thread()
+        self._queue.put(item)
+        return item.future
+
+    def call(self, fn: Callable[[], object]):
+        """Run ``fn`` on the batcher thread and return its result (blocking)."""
+        if threading.current_thread() is self._thread:
+            return fn()
+        return self.submit(_ScheduledCall(fn=fn, future=Future())).result()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._loop,
+                    name="transcription-batcher",
+                    daemon=True,
+                )
+                self._thread.start()
+
+    def _gather(
+        self,
+        first: _PendingTranscription,
+        calls: List[_ScheduledCall],
+    ) -> List[_PendingTranscription]:
+        batch = [first]
+        if self._queue.empty():
+            return batch
+        deadline = time.monotonic() + self._max_wait_s
+        while len(batch) < self._max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:  # Shutdown sentinel; put it back for the loop
+                self._queue.put(None)
+                break
+            if isinstance(item, _ScheduledCall):
+                calls.append(item)  # Run once this batch is done
+                continue
+            batch.append(item)
+        return batch
+
+    @staticmethod
+    def _bucket(item: _PendingTranscription) -> int:
+        for index, edge in enumerate(_BATCH_BUCKET_EDGES_S):
+            if item.audio_sec < edge:
+                return index
+        return len(_BATCH_BUCKET_EDGES_S)
+
+    def _loop(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            if isinstance(first, _ScheduledCall):
+                first.run()
+                continue
+            calls: List[_ScheduledCall] = []
+            batch = self._gather(first, calls)
+
+            groups: dict[tuple, List[_PendingTranscription]] = {}
+            for item in batch:
+                if item.future.set_running_or_notify_cancel():
+                    bucket = self._bucket(item)
+                    if bucket == len(_BATCH_BUCKET_EDGES_S):
+                        # Long-form clips are decoded on their own
+                        groups[("long", id(item))] = [item]
+                    else:
+                        groups.setdefault((item.lang_code, bucket), []).append(item)
+
+            for items in groups.values():
+                try:
+                    # The concurrency slot is taken per batch, not per request,
+                    # so requests can queue here while a batch runs
+                    with inference_slot():
+                        texts = self._run_batch(items)
+                except Exception as exc:
+                    for item in items:
+                        item.future.set_exception(exc)
+                    continue
+                for item, text in zip(items, texts):
+                    item.future.set_result(text)
+
+            for call in calls:
+                call.run()
+
+    def shutdown(self):
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=2.0)
+        self._thread = None
+
 
 class TranscriptionManager:
     """Singleton manager for Whisper transcription model."""
@@ -37,9 +259,20 @@ class TranscriptionManager:
         if self._initialized:
             return
 
-        self._pipeline = None
+        self._model = None
+        self._processor = None
+        # Reusable log-mel staging on CUDA: pinned host buffer -> device buffer
+        self._feature_staging: Optional[torch.Tensor] = None
+        self._feature_buf: Optional[torch.Tensor] = None
+        self._copy_stream = None
         self._model_lock = threading.Lock()
-        self._device = self._detect_device()
+        self._device = DEVICE
+        self._dtype = torch.float16 if self._device != "cpu" else torch.float32
+        self._backend = WHISPER_BACKEND
+        self._generate_overrides: dict = {}
+        self._eager_decoder_forward = None  # Set while the decoder is compiled
+        self._lang_generate_kwargs: dict[Optional[str], dict] = {}
+        self._scheduler = _BatchScheduler(self._run_batch)
         self._last_used: float | None = None
         self._idle_timeout_s = max(0, MODEL_IDLE_TIMEOUT_S)
         self._cleanup_interval_s = max(30, min(300, self._idle_timeout_s // 6)) if self._idle_timeout_s else 0
@@ -55,53 +288,30 @@ class TranscriptionManager:
         self._initialized = True
 
         logger.info(
-            "Transcription Manager initialized. Device: %s, idle_timeout_s: %s",
+            "Transcription Manager initialized. Device: %s, backend: %s, idle_timeout_s: %s",
             self._device,
+            self._backend,
             self._idle_timeout_s,
         )
 
-    def _detect_device(self) -> str:
-        """Detect the best available compute device."""
-        if torch.cuda.is_available():
-            return "cuda:0"
-        
-        # Check for Apple Silicon (MPS)
-        if hasattr(torch.backends, 'mps') and torch.backends.mps.is_available():
-            return "mps"
-            
-        return "cpu"
-
-    def _get_pipeline(self):
-        """Get or load the Whisper pipeline."""
-        from app.services.status_manager import status_manager
-        
+    def _get_model(self):
+        """Get or load the Whisper model."""
+        loaded = False
         with self._model_lock:
-            if self._pipeline is None:
-                logger.info("Loading Whisper model for transcription...")
+            if self._model is None:
+                logger.info("Loading Whisper model for transcription (%s)...", self._backend)
                 status_manager.info("Loading transcription model...")
 
                 try:
-                    from transformers import pipeline
-
-                    # Use whisper-base for good balance of speed and accuracy
-                    dtype = torch.float16 if self._device.startswith("cuda") else torch.float32
-                    pipeline_kwargs = {
-                        "task": "automatic-speech-recognition",
-                        "model": "openai/whisper-base",
-                        "device": self._device,
-                    }
-
-                    try:
-                        self._pipeline = pipeline(
-                            **pipeline_kwargs,
-                            dtype=dtype,
-                        )
-                    except TypeError:
-                        self._pipeline = pipeline(
-                            **pipeline_kwargs,
-                            torch_dtype=dtype,
-                        )
-                    
+                    if self._backend == "faster-whisper":
+                        self._model = self._load_faster_whisper()
+                    else:
+                        self._model = self._load_transformers_model()
+                    # A compiled model is warmed up on the batcher thread below
+                    if SHOULD_WARMUP and not self._generate_overrides:
+                        self._warmup(self._model)
+                    loaded = True
+
                     logger.info("Whisper model loaded successfully")
                     status_manager.success("Transcription model loaded")
 
@@ -111,25 +321,188 @@ class TranscriptionManager:
                     raise
 
             self._last_used = time.monotonic()
-            return self._pipeline
+            model = self._model
+
+        if loaded and self._generate_overrides:
+            # Outside the lock: the batcher thread may itself be waiting on it
+            try:
+                self._scheduler.call(partial(self._warmup_compiled, model))
+            except Exception as e:
+                logger.warning("Whisper compile warm-up failed, falling back to eager decoding: %s", e)
+        return model
+
+    def _load_transformers_model(self):
+        """Load whisper-base and its processor for direct generate() calls."""
+        from transformers import WhisperForConditionalGeneration, WhisperProcessor
+
+        # Use whisper-base for good balance of speed and accuracy
+        self._processor = WhisperProcessor.from_pretrained(WHISPER_MODEL_ID)
+        model = WhisperForConditionalGeneration.from_pretrained(
+            WHISPER_MODEL_ID,
+            attn_implementation=detect_attn_impl(),
+            **{hf_dtype_kwarg(): self._dtype},
+        ).to(self._device)
+        model.eval()
+
+        if self._device.startswith("cuda"):
+            self._allocate_feature_buffers(model)
+        if TORCH_COMPILE and self._device.startswith("cuda"):
+            self._compile_model(model)
+        return model
+
+    def _allocate_feature_buffers(self, model):
+        """Preallocate single-window log-mel buffers for a full batch."""
+        shape = (
+            WHISPER_BATCH_MAX_SIZE,
+            model.config.num_mel_bins,
+            self._processor.feature_extractor.nb_max_frames,
+        )
+        self._feature_staging = torch.empty(shape, dtype=self._dtype, pin_memory=True)
+        self._feature_buf = torch.empty(shape, dtype=self._dtype, device=self._device)
+        self._copy_stream = torch.cuda.Stream(device=self._device)
+
+    def _features_to_device(self, features: torch.Tensor) -> torch.Tensor:
+        """Move log-mels to the device, through the reusable buffers when they fit.
+
+        The cast to the model dtype happens on the host while filling the pinned
+        buffer, so only half-precision bytes cross PCIe, on a side stream that
+        the compute stream then waits on.
+        """
+        staging = self._feature_staging
+        if (
+            staging is None
+            or features.shape[0] > staging.shape[0]
+            or features.shape[1:] != staging.shape[1:]
+        ):
+            return features.to(self._device, dtype=self._dtype)
+
+        count = features.shape[0]
+        host = staging[:count]
+        host.copy_(features)
+        device_buf = self._feature_buf[:count]
+        with torch.cuda.stream(self._copy_stream):
+            device_buf.copy_(host, non_blocking=True)
+        torch.cuda.current_stream().wait_stream(self._copy_stream)
+        return device_buf
+
+    def _load_faster_whisper(self):
+        """Load whisper-base through CTranslate2 with INT8 weights."""
+        from faster_whisper import WhisperModel
+
+        # CTranslate2 only supports NVIDIA CUDA; MPS and ROCm run it on the CPU
+        use_cuda = self._device.startswith("cuda") and not HAS_ROCM
+        return WhisperModel(
+            "base",
+            device="cuda" if use_cuda else "cpu",
+            compute_type="int8_float16" if use_cuda else "int8",
+            num_workers=1,
+            cpu_threads=os.cpu_count() or 0,
+        )
+
+    def _warmup(self, model):
+        """Decode a few seconds of silence so the first request skips kernel setup."""
+        warmup = np.zeros(WHISPER_SAMPLE_RATE * 5, dtype=np.float32)
+        try:
+            if self._backend == "faster-whisper":
+                segments, _ = model.transcribe(warmup, language="en", beam_size=1)
+                list(segments)  # Segments are decoded lazily
+            else:
+                self._generate(model, [warmup], "en")
+        except Exception as e:
+            logger.warning("Whisper warm-up failed: %s", e)
+
+    def _compile_model(self, model):
+        """torch.compile the Whisper decoder over a static KV-cache.
+
+        With a fixed cache shape the CUDA graphs captured by "reduce-overhead"
+        cover every decode step. Compilation itself happens in
+        ``_warmup_compiled``.
+        """
+        logger.info("Compiling Whisper decoder with torch.compile...")
+        decoder = model.model.decoder
+        self._eager_decoder_forward = decoder.forward
+        decoder.forward = torch.compile(
+            decoder.forward,
+            mode="reduce-overhead",
+            fullgraph=True,
+            dynamic=False,
+        )
+        self._generate_overrides = {
+            "cache_implementation": "static",
+            "max_new_tokens": WHISPER_MAX_NEW_TOKENS,
+        }
+
+    def _warmup_compiled(self, model):
+        """Compile and record CUDA graphs for every padded batch size.
+
+        CUDA graph trees are thread-local, so this runs on the batcher thread,
+        where all transformers decoding happens. Each size decodes the full
+        token budget once on silence. On failure the model goes back to eager
+        decoding before the error is raised, so later requests still work.
+        """
+        started = time.monotonic()
+        try:
+            for size in _COMPILED_BATCH_SIZES:
+                self._generate(
+                    model,
+                    [_PAD_CLIP] * size,
+                    "en",
+                    min_new_tokens=WHISPER_MAX_NEW_TOKENS,
+                )
+        except Exception:
+            self._uncompile_model(model)
+            raise
+        logger.info(
+            "Compiled Whisper decoder for batch sizes %s in %.1fs",
+            _COMPILED_BATCH_SIZES,
+            time.monotonic() - started,
+        )
+
+    @contextmanager
+    def _eager_decoding(self, model):
+        """Temporarily swap in the uncompiled decoder forward.
+
+        Only safe on the batcher thread, which runs every transformers decode.
+        """
+        eager = self._eager_decoder_forward
+        if eager is None:
+            yield
+            return
+        decoder = model.model.decoder
+        compiled = decoder.forward
+        decoder.forward = eager
+        try:
+            yield
+        finally:
+            decoder.forward = compiled
+
+    def _uncompile_model(self, model):
+        """Restore the eager decoder and the default dynamic KV-cache."""
+        if self._eager_decoder_forward is not None:
+            model.model.decoder.forward = self._eager_decoder_forward
+            self._eager_decoder_forward = None
+        self._generate_overrides = {}
+        if hasattr(model, "_cache"):
+            del model._cache  # The static cache generate() kept for reuse
 
     def _clear_device_cache(self):
         gc.collect()
-        if torch.cuda.is_available():
+        if HAS_CUDA:
             torch.cuda.empty_cache()
-        elif (
-            hasattr(torch, "mps")
-            and hasattr(torch.mps, "empty_cache")
-            and hasattr(torch.backends, "mps")
-            and torch.backends.mps.is_available()
-        ):
+        elif HAS_MPS and hasattr(torch, "mps") and hasattr(torch.mps, "empty_cache"):
             torch.mps.empty_cache()
 
     def _unload_locked(self) -> bool:
-        if self._pipeline is None:
+        if self._model is None:
             return False
-        del self._pipeline
-        self._pipeline = None
+        del self._model
+        self._model = None
+        self._processor = None
+        self._feature_staging = None
+        self._feature_buf = None
+        self._copy_stream = None
+        self._generate_overrides = {}
+        self._eager_decoder_forward = None
         self._last_used = None
         return True
 
@@ -139,7 +512,7 @@ class TranscriptionManager:
             now = time.monotonic()
             with self._model_lock:
                 if (
-                    self._pipeline is not None
+                    self._model is not None
                     and self._last_used is not None
                     and (now - self._last_used) >= self._idle_timeout_s
                 ):
@@ -148,6 +521,34 @@ class TranscriptionManager:
                 self._clear_device_cache()
                 logger.info("Unloaded idle transcription model after %ss", self._idle_timeout_s)
 
+    def _prepare_audio(self, audio: np.ndarray, sample_rate: int) -> np.ndarray:
+        """Coerce audio to contiguous float32 mono at 16kHz.
+
+        Input that is already in that form (the transcription router resamples
+        upfront) is returned without a copy. Otherwise resampling runs on the
+        GPU when there is one, then through soxr on the CPU if it is installed.
+        """
+        if audio.ndim == 2:
+            audio = audio.mean(axis=-1, dtype=np.float32)  # (time, channels) -> (time,)
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        if sample_rate == WHISPER_SAMPLE_RATE:
+            return audio
+
+        if not self._device.startswith("cuda") and HAS_SOXR:
+            return soxr.resample(audio, sample_rate, WHISPER_SAMPLE_RATE, quality="HQ")
+
+        import torchaudio.functional as AF
+
+        device = self._device if self._device.startswith("cuda") else "cpu"
+        with torch.inference_mode():
+            resampled = AF.resample(
+                torch.from_numpy(audio).to(device),
+                orig_freq=sample_rate,
+                new_freq=WHISPER_SAMPLE_RATE,
+            )
+        # The feature extractor computes log-mels from host float32 audio
+        return resampled.cpu().numpy()
+
     def transcribe(
         self,
         audio: np.ndarray,
@@ -158,64 +559,38 @@ class TranscriptionManager:
         Transcribe audio to text.
 
         Args:
-            audio: Audio data as numpy array
+            audio: Audio data as numpy array, (time,) or (time, channels)
             sample_rate: Sample rate of the audio
             language: Optional language hint (ISO 639-1 code, e.g., 'en', 'zh')
 
         Returns:
             Transcribed text
         """
-        from app.services.status_manager import status_manager
+        audio = self._prepare_audio(audio, sample_rate)
+        sample_rate = WHISPER_SAMPLE_RATE
+        if self._should_skip(audio):
+            return ""
+        audio_sec = audio.shape[0] / sample_rate
         
-        pipe = self._get_pipeline()
+        model = self._get_model()
         
         status_manager.info("Transcribing audio...")
         
         try:
-            # Prepare audio input
-            audio_input = {"array": audio, "sampling_rate": sample_rate}
-            
-            # Build generation kwargs
-            generate_kwargs = {
-                "task": "transcribe",
-            }
-            if language:
-                # Map common language names to codes
-                lang_map = {
-                    "English": "en",
-                    "Chinese": "zh",
-                    "Japanese": "ja",
-                    "Korean": "ko",
-                    "German": "de",
-                    "French": "fr",
-                    "Russian": "ru",
-                    "Portuguese": "pt",
-                    "Spanish": "es",
-                    "Italian": "it",
-                }
-                lang_code = lang_map.get(language, language.lower()[:2] if len(language) >= 2 else None)
-                if lang_code:
-                    generate_kwargs["language"] = lang_code
-
-            # First try a straightforward transcription (most reliable for short clips)
-            result = pipe(
-                audio_input,
-                generate_kwargs=generate_kwargs,
-            )
-
-            text = result.get("text", "").strip()
-
-            # If text is empty/too short, fall back to chunked decoding
-            if len(text) < 3:
-                chunked = pipe(
-                    audio_input,
-                    chunk_length_s=15,
-                    stride_length_s=3,
-                    generate_kwargs=generate_kwargs,
-                )
-                chunk_text = chunked.get("text", "").strip()
-                if len(chunk_text) > len(text):
-                    text = chunk_text
+            lang_code = self._resolve_language(language)
+
+            if self._backend == "faster-whisper":
+                # Long-form audio is windowed internally
+                with inference_slot():
+                    segments, _ = model.transcribe(
+                        audio,
+                        language=lang_code,
+                        beam_size=1,
+                        vad_filter=True,
+                    )
+                    text = "".join(segment.text for segment in segments).strip()
+            else:
+                text = self._submit(audio, audio_sec, lang_code)
             
             logger.info(f"Transcription complete: {len(text)} characters")
             status_manager.success("Transcription complete")
@@ -227,6 +602,175 @@ class TranscriptionManager:
             status_manager.error(f"Transcription failed: {e}")
             raise
 
+    def transcribe_stream(
+        self,
+        audio: np.ndarray,
+        sample_rate: int,
+        language: Optional[str] = None,
+    ) -> Iterator[str]:
+        """
+        Transcribe audio incrementally, yielding text as each part is decoded.
+
+        The transformers backend decodes consecutive STREAM_WINDOW_S windows
+        (through the batch scheduler, so concurrent streams still batch);
+        faster-whisper yields its own lazily decoded segments. Words straddling
+        a window edge may be split, so use transcribe() when latency to the
+        first words matters less than accuracy.
+
+        Args:
+            audio: Audio data as numpy array, (time,) or (time, channels)
+            sample_rate: Sample rate of the audio
+            language: Optional language hint (ISO 639-1 code, e.g., 'en', 'zh')
+
+        Yields:
+            Non-empty transcribed text pieces, in order
+        """
+        audio = self._prepare_audio(audio, sample_rate)
+        if self._should_skip(audio):
+            return
+
+        model = self._get_model()
+        lang_code = self._resolve_language(language)
+        status_manager.info("Transcribing audio...")
+
+        try:
+            if self._backend == "faster-whisper":
+                with inference_slot():
+                    segments, _ = model.transcribe(
+                        audio,
+                        language=lang_code,
+                        beam_size=1,
+                        vad_filter=True,
+                    )
+                    for segment in segments:
+                        text = segment.text.strip()
+                        if text:
+                            yield text
+            else:
+                window = int(STREAM_WINDOW_S * WHISPER_SAMPLE_RATE)
+                for start in range(0, audio.shape[0], window):
+                    chunk = audio[start:start + window]
+                    if self._should_skip(chunk):
+                        continue
+                    text = self._submit(chunk, chunk.shape[0] / WHISPER_SAMPLE_RATE, lang_code)
+                    if text:
+                        yield text
+            status_manager.success("Transcription complete")
+
+        except Exception as e:
+            logger.error(f"Streaming transcription failed: {e}")
+            status_manager.error(f"Transcription failed: {e}")
+            raise
+
+    @staticmethod
+    def _resolve_language(language: Optional[str]) -> Optional[str]:
+        """Map a language hint to a Whisper code; None means auto-detect."""
+        if not language:
+            return None
+        lang_code = _LANG_MAP.get(language)
+        if lang_code is None and len(language) >= 2:
+            lang_code = language.lower()[:2]
+        return lang_code
+
+    @staticmethod
+    def _should_skip(audio: np.ndarray) -> bool:
+        """True for 16kHz clips too short or too quiet to be worth decoding."""
+        # Too short for Whisper to detect anything reliably; don't run the model
+        audio_sec = audio.shape[0] / WHISPER_SAMPLE_RATE
+        if audio_sec < MIN_AUDIO_S:
+            logger.info("Skipping transcription of %.3fs clip", audio_sec)
+            return True
+
+        # Silent input can only decode to nothing (or hallucinations); skip the model
+        rms = float(np.sqrt(np.dot(audio, audio) / audio.shape[0]))
+        if rms < SILENCE_RMS:
+            logger.info("Skipping transcription of silent clip (rms=%.5f)", rms)
+            return True
+        return False
+
+    def _submit(self, audio: np.ndarray, audio_sec: float, lang_code: Optional[str]) -> str:
+        """Decode one 16kHz clip with the transformers backend and wait for its text."""
+        # Concurrent callers are coalesced into one batched forward pass
+        return self._scheduler.submit(
+            _PendingTranscription(
+                audio=audio,
+                sample_rate=WHISPER_SAMPLE_RATE,
+                audio_sec=audio_sec,
+                lang_code=lang_code,
+                future=Future(),
+            )
+        ).result()
+
+    def _generate(
+        self,
+        model,
+        audios: List[np.ndarray],
+        lang_code: Optional[str],
+        long_form: bool = False,
+        **overrides,
+    ) -> List[str]:
+        """Extract log-mels and greedy-decode a batch of 16kHz clips."""
+        count = len(audios)
+        if long_form:
+            # Keep the full signal; generate() then walks it in 30s windows
+            features = self._processor.feature_extractor(
+                audios,
+                sampling_rate=WHISPER_SAMPLE_RATE,
+                return_tensors="pt",
+                truncation=False,
+                padding="longest",
+                return_attention_mask=True,
+            )
+            inputs = {"attention_mask": features.attention_mask.to(self._device)}
+        else:
+            if self._generate_overrides:
+                # Pad with silence to a batch size the compiled decoder was warmed up for
+                padded = next((size for size in _COMPILED_BATCH_SIZES if size >= count), count)
+                audios = list(audios) + [_PAD_CLIP] * (padded - count)
+            features = self._processor.feature_extractor(
+                audios,
+                sampling_rate=WHISPER_SAMPLE_RATE,
+                return_tensors="pt",
+            )
+            inputs = dict(self._generate_overrides)
+        inputs.update(overrides)
+
+        generate_kwargs = self._generate_kwargs_for(lang_code)
+        input_features = self._features_to_device(features.input_features)
+        # Long-form decoding uses a growing dynamic cache, which the compiled
+        # (static-shape) decoder would recompile for at every step
+        decoder_mode = self._eager_decoding(model) if long_form else nullcontext()
+        with torch.inference_mode(), decoder_mode:
+            ids = model.generate(input_features, **generate_kwargs, **inputs)
+        return [text.strip() for text in self._processor.batch_decode(ids[:count], skip_special_tokens=True)]
+
+    def _generate_kwargs_for(self, lang_code: Optional[str]) -> dict:
+        """Per-language generate() kwargs, built once and reused read-only.
+
+        Only known codes are cached; anything else comes from user input, so it
+        is built per call (and generate() will reject it) to keep the cache bounded.
+        """
+        kwargs = self._lang_generate_kwargs.get(lang_code)
+        if kwargs is None:
+            kwargs = {**_BASE_GENERATE_KWARGS, "language": lang_code} if lang_code else dict(_BASE_GENERATE_KWARGS)
+            if lang_code is None or lang_code in _KNOWN_LANG_CODES:
+                self._lang_generate_kwargs[lang_code] = kwargs
+        return kwargs
+
+    def _run_batch(self, items: List[_PendingTranscription]) -> List[str]:
+        """Transcribe one homogeneous group of requests with the transformers model.
+
+        All items share a language. Clips that fit Whisper's 30s window are
+        decoded in a single batched generate() call; longer ones arrive alone
+        and use Whisper's sequential long-form decoding.
+        """
+        model = self._get_model()
+        audios = [item.audio for item in items]
+        if len(items) > 1:
+            logger.info("Batching %d transcription requests", len(items))
+        long_form = items[0].audio_sec >= SINGLE_WINDOW_S
+        return self._generate(model, audios, items[0].lang_code, long_form=long_form)
+
     def unload(self):
         """Unload the model to free memory."""
         with self._model_lock:
@@ -236,8 +780,9 @@ class TranscriptionManager:
             logger.info("Transcription model unloaded")
 
     def shutdown(self):
-        """Stop background cleanup and unload the model."""
+        """Stop background cleanup and batching, then unload the model."""
         self._stop_cleanup.set()
+        self._scheduler.shutdown()
         if self._cleanup_thread and self._cleanup_thread.is_alive():
             self._cleanup_thread.join(timeout=2.0)
         self.unload()
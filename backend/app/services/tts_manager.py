@@ -9,12 +9,18 @@ import logging
 import threading
 import time
 import gc
-from typing import Dict, Optional, Tuple, Union
+import functools
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
 import torch
 import numpy as np
 
-from app.config import MODEL_IDLE_TIMEOUT_S
+from app.config import MODEL_IDLE_TIMEOUT_S, QUANTIZE_TTS, TTS_COMPILE, TTS_PREFETCH
+from app.services.status_manager import status_manager
+from app.utils.device import DEVICE, HAS_CUDA, HAS_MPS, HAS_ROCM, SHOULD_WARMUP, detect_attn_impl, hf_dtype_kwarg
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +33,30 @@ MODEL_IDS = {
     "custom_1.7B": "Qwen/Qwen3-TTS-12Hz-1.7B-CustomVoice",
 }
 
+WARMUP_MAX_NEW_TOKENS = 32  # Enough codec steps to exercise every kernel
+# Static KV-cache length for compiled talkers: qwen_tts's default 2048 new
+# codec tokens plus room for the prompt (longer requests get a bigger cache)
+TTS_STATIC_CACHE_LEN = 4096
+PREFETCH_MIN_TRANSITIONS = 2  # Times a switch must be seen before it is predicted
+
+
+def _on_graph_thread(method):
+    """Run a TTSManager method on its CUDA-graph thread when models are compiled.
+
+    Inductor's CUDA graph trees are thread-local: graphs recorded on one
+    thread are recorded again (with their own memory pool) the first time
+    another thread runs the model. Routing every load, warm-up and
+    generation through one thread keeps the load-time warm-up useful and
+    the graphs recorded once, at the cost of serialising TTS generation.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self._graph_executor is None or getattr(self._graph_local, "active", False):
+            return method(self, *args, **kwargs)
+        return self._graph_executor.submit(method, self, *args, **kwargs).result()
+
+    return wrapper
+
 
 class TTSManager:
     """Singleton manager for Qwen3-TTS models."""
@@ -47,9 +77,26 @@ class TTSManager:
             return
 
         self._models: Dict[str, object] = {}
-        self._last_used: Dict[str, float] = {}
-        self._model_lock = threading.Lock()
-        self._device = self._detect_device()
+        self._offloaded: Dict[str, object] = {}  # Idle models parked in pinned host memory
+        self._last_used: Dict[str, float] = {}  # For parked models: when they were parked
+        # One lock per model key so loading one model never blocks another;
+        # _locks_lock guards the lock table and is held by unload_all.
+        self._key_locks: defaultdict[str, threading.Lock] = defaultdict(threading.Lock)
+        self._locks_lock = threading.Lock()
+        # Which model key tends to follow which, for background prefetching
+        self._transitions: Dict[str, Counter] = defaultdict(Counter)
+        self._prev_key: Optional[str] = None
+        self._history_lock = threading.Lock()
+        self._prefetch_slot = threading.Lock()  # At most one prefetch in flight
+        self._graph_local = threading.local()
+        self._graph_executor: Optional[ThreadPoolExecutor] = None
+        if TTS_COMPILE and HAS_CUDA:
+            self._graph_executor = ThreadPoolExecutor(
+                max_workers=1,
+                thread_name_prefix="tts-graphs",
+                initializer=self._mark_graph_thread,
+            )
+        self._device = DEVICE
         self._dtype = torch.bfloat16 if self._device != "cpu" else torch.float32
         self._idle_timeout_s = max(0, MODEL_IDLE_TIMEOUT_S)
         self._cleanup_interval_s = max(30, min(300, self._idle_timeout_s // 6)) if self._idle_timeout_s else 0
@@ -71,31 +118,35 @@ class TTSManager:
             self._idle_timeout_s,
         )
 
-    def _detect_device(self) -> str:
-        """Detect the best available compute device."""
-        if torch.cuda.is_available():
-            return "cuda:0"
-        
-        # Check for Apple Silicon (MPS)
-        if hasattr(torch.backends, 'mps') and torch.backends.mps.is_available():
-            return "mps"
-            
-        # Check for ROCm (AMD GPU)
-        try:
-            if hasattr(torch.version, 'hip') and torch.version.hip is not None:
-                return "cuda:0"  # ROCm uses cuda device naming
-        except Exception:
-            pass
-        return "cpu"
-
-    def _get_model(self, model_key: str):
-        """Get or load a model by key."""
-        from app.services.status_manager import status_manager
-        
+    def _mark_graph_thread(self):
+        self._graph_local.active = True
+
+    def _get_model(self, model_key: str, prefetch: bool = False):
+        """Get or load a model by key.
+
+        Request-driven calls also record which model was used before this one
+        and start prefetching the model that usually comes next.
+        """
+        model = self._get_or_load(model_key)
+        # A speculative load and compile would hold the CUDA-graph thread that
+        # every request waits on, so compiled models aren't prefetched
+        if not prefetch and TTS_PREFETCH and self._graph_executor is None:
+            self._record_and_prefetch(model_key)
+        return model
+
+    def _get_or_load(self, model_key: str):
+        """Return the model for ``model_key``, restoring or loading it if needed."""
         if model_key not in MODEL_IDS:
             raise ValueError(f"Unknown model key: {model_key}")
 
-        with self._model_lock:
+        with self._key_lock(model_key):
+            if model_key not in self._models and model_key in self._offloaded:
+                model = self._offloaded.pop(model_key)
+                self._restore_to_device(model)
+                self._sync_current_stream()
+                self._models[model_key] = model
+                logger.info("Restored model from host memory: %s", model_key)
+
             if model_key not in self._models:
                 model_id = MODEL_IDS[model_key]
                 logger.info(f"Loading model: {model_id}")
@@ -104,32 +155,20 @@ class TTSManager:
                 try:
                     from qwen_tts import Qwen3TTSModel
 
-                    # Determine attention implementation
-                    attn_impl = None
-                    if self._device != "cpu":
-                        try:
-                            import flash_attn
-                            attn_impl = "flash_attention_2"
-                        except ImportError:
-                            attn_impl = "sdpa"  # Fallback to scaled dot product attention
-
                     load_kwargs = {
                         "device_map": self._device,
-                        "attn_implementation": attn_impl,
+                        "attn_implementation": detect_attn_impl(),
                     }
 
-                    try:
-                        model = Qwen3TTSModel.from_pretrained(
-                            model_id,
-                            dtype=self._dtype,
-                            **load_kwargs,
-                        )
-                    except TypeError:
-                        model = Qwen3TTSModel.from_pretrained(
-                            model_id,
-                            torch_dtype=self._dtype,
-                            **load_kwargs,
-                        )
+                    load_kwargs[hf_dtype_kwarg()] = self._dtype
+                    model = Qwen3TTSModel.from_pretrained(model_id, **load_kwargs)
+                    if QUANTIZE_TTS:
+                        self._quantize(model)
+                    if TTS_COMPILE and HAS_CUDA:
+                        self._compile(model_key, model)  # Includes its own warm-up
+                    elif SHOULD_WARMUP:
+                        self._warmup(model_key, model)
+                    self._sync_current_stream()
                     self._models[model_key] = model
                     logger.info(f"Model loaded: {model_id}")
                     status_manager.success(f"Model loaded: {model_id}")
@@ -142,6 +181,199 @@ class TTSManager:
             self._touch_model(model_key)
             return self._models[model_key]
 
+    @staticmethod
+    def _sync_current_stream():
+        """Wait for copies queued on this thread's stream before publishing a model.
+
+        Prefetches load on a side stream, and requests on other streams
+        would not otherwise wait for those weight copies.
+        """
+        if HAS_CUDA:
+            torch.cuda.current_stream().synchronize()
+
+    def _record_and_prefetch(self, model_key: str):
+        with self._history_lock:
+            prev_key, self._prev_key = self._prev_key, model_key
+            if prev_key is not None and prev_key != model_key:
+                self._transitions[prev_key][model_key] += 1
+            likely = self._transitions[model_key].most_common(1)
+
+        if not likely or likely[0][1] < PREFETCH_MIN_TRANSITIONS:
+            return
+        next_key = likely[0][0]
+        if next_key in self._models or not self._prefetch_slot.acquire(blocking=False):
+            return
+        threading.Thread(
+            target=self._prefetch,
+            args=(next_key,),
+            name=f"tts-prefetch-{next_key}",
+            daemon=True,
+        ).start()
+
+    def _prefetch(self, model_key: str):
+        """Load or restore ``model_key`` in the background (holds the prefetch slot)."""
+        try:
+            if model_key in self._models:
+                return
+            logger.info("Prefetching model: %s", model_key)
+            if HAS_CUDA:
+                # Weight copies go on a side stream so they don't queue behind
+                # generation running on the default stream
+                with torch.cuda.stream(torch.cuda.Stream(device=self._device)):
+                    self._get_model(model_key, prefetch=True)
+            else:
+                self._get_model(model_key, prefetch=True)
+        except Exception as e:
+            logger.warning("Prefetch of %s failed: %s", model_key, e)
+        finally:
+            self._prefetch_slot.release()
+
+    def _warmup(self, model_key: str, model) -> bool:
+        """Generate a short clip so the first request skips kernel setup."""
+        started = time.monotonic()
+        kwargs = {"text": "warmup", "language": "English", "max_new_tokens": WARMUP_MAX_NEW_TOKENS}
+        try:
+            with torch.inference_mode():
+                if model_key == "voice_design":
+                    model.generate_voice_design(instruct="", **kwargs)
+                elif model_key.startswith("custom_"):
+                    speakers = model.get_supported_speakers() or ["Vivian"]
+                    model.generate_custom_voice(speaker=speakers[0], **kwargs)
+                else:
+                    model.generate_voice_clone(
+                        ref_audio=(np.zeros(24000, dtype=np.float32), 24000),
+                        x_vector_only_mode=True,
+                        **kwargs,
+                    )
+        except Exception as e:
+            logger.warning("Warm-up failed for %s: %s", model_key, e)
+            return False
+        logger.info("Warmed up %s in %.1fs", model_key, time.monotonic() - started)
+        return True
+
+    def _compile(self, model_key: str, model):
+        """torch.compile the talker's decoder stacks over a static KV-cache.
+
+        Both the talker and its code predictor decode one step at a time, so
+        each decoder forward is compiled with CUDA graphs ("reduce-overhead")
+        and their generation configs switch to a static cache to keep shapes
+        fixed. generate() sizes the talker's cache from prompt length plus
+        ``max_new_tokens`` (which qwen_tts always passes), so it is pinned to at
+        least TTS_STATIC_CACHE_LEN; otherwise every new length would recompile
+        and re-record the graphs. The code predictor's length never changes.
+        The warm-up therefore runs at the same cache shape as live requests and
+        pays the compile cost at load time; if compiling or the warm-up fails,
+        the model is put back to eager mode. This runs on
+        the CUDA-graph thread, as do all later generations (see
+        ``_on_graph_thread``).
+        """
+        talker = getattr(getattr(model, "model", None), "talker", None)
+        if not isinstance(talker, torch.nn.Module):
+            logger.warning("Model has no talker module to compile")
+            return
+
+        targets = [talker, getattr(talker, "code_predictor", None)]
+        originals = []
+        for target in targets:
+            decoder = getattr(target, "model", None)
+            if not isinstance(decoder, torch.nn.Module):
+                continue
+            originals.append((target, decoder, decoder.forward, target.generation_config.cache_implementation))
+            target.generation_config.cache_implementation = "static"
+            decoder.forward = torch.compile(
+                decoder.forward,
+                mode="reduce-overhead",
+                fullgraph=True,
+            )
+
+        get_cache = talker._get_cache
+
+        def fixed_length_cache(*args, max_cache_len: int, **kwargs):
+            if max_cache_len > TTS_STATIC_CACHE_LEN:
+                logger.info("%s needs a %d-token KV-cache, past the compiled length", model_key, max_cache_len)
+            return get_cache(*args, max_cache_len=max(max_cache_len, TTS_STATIC_CACHE_LEN), **kwargs)
+
+        # generate() reuses a cached StaticCache that is at least this long
+        talker._get_cache = fixed_length_cache
+
+        logger.info("Compiling %s decoder with torch.compile...", model_key)
+        if self._warmup(model_key, model):
+            model._compiled = True
+            return
+
+        logger.warning("Falling back to eager decoding for %s", model_key)
+        del talker._get_cache
+        for target, decoder, forward, cache_implementation in originals:
+            decoder.forward = forward
+            target.generation_config.cache_implementation = cache_implementation
+            if hasattr(target, "_cache"):
+                del target._cache
+
+    @staticmethod
+    def _torch_modules(model) -> Iterator[torch.nn.Module]:
+        """Yield the modules behind a Qwen3TTSModel: the LLM and its codec."""
+        core = getattr(model, "model", None)
+        if not isinstance(core, torch.nn.Module):
+            return
+        yield core
+        codec = getattr(getattr(core, "speech_tokenizer", None), "model", None)
+        if isinstance(codec, torch.nn.Module):
+            yield codec
+
+    def _quantize(self, model):
+        """Quantize the talker's linear layers in place with torchao.
+
+        FP8 row-wise on sm89+ GPUs, INT8 weight-only on older CUDA GPUs. The
+        codec and speaker encoder stay in bf16. Without torchao or an NVIDIA
+        GPU the model is left as loaded.
+        """
+        if not HAS_CUDA or HAS_ROCM:
+            logger.warning("QUANTIZE_TTS needs an NVIDIA CUDA GPU; keeping %s weights", self._dtype)
+            return
+        try:
+            from torchao.quantization import (
+                Float8DynamicActivationFloat8WeightConfig,
+                Int8WeightOnlyConfig,
+                PerRow,
+                quantize_,
+            )
+        except ImportError:
+            logger.warning("QUANTIZE_TTS is set but torchao is not installed; keeping %s weights", self._dtype)
+            return
+
+        talker = getattr(getattr(model, "model", None), "talker", None)
+        if not isinstance(talker, torch.nn.Module):
+            logger.warning("Model has no talker module to quantize")
+            return
+
+        if torch.cuda.get_device_capability() >= (8, 9):
+            config = Float8DynamicActivationFloat8WeightConfig(granularity=PerRow())
+        else:
+            config = Int8WeightOnlyConfig()
+        quantize_(
+            talker,
+            config,
+            filter_fn=lambda module, _fqn: isinstance(module, torch.nn.Linear),
+        )
+        model._quantized = True
+        logger.info("Quantized talker with %s", type(config).__name__)
+
+    def _offload_to_host(self, model):
+        """Move a model's weights to pinned CPU memory."""
+        for module in self._torch_modules(model):
+            module.to("cpu")
+            for tensor in chain(module.parameters(), module.buffers()):
+                tensor.data = tensor.data.pin_memory()
+
+    def _restore_to_device(self, model):
+        """Copy an offloaded model back; pinned memory makes this an async H2D copy."""
+        for module in self._torch_modules(model):
+            module.to(self._device, non_blocking=True)
+
+    def _key_lock(self, model_key: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._key_locks[model_key]
+
     def _touch_model(self, model_key: str):
         """Mark a model as recently used."""
         self._last_used[model_key] = time.monotonic()
@@ -149,23 +381,24 @@ class TTSManager:
     def _clear_device_cache(self):
         """Release framework caches after model unload."""
         gc.collect()
-        if torch.cuda.is_available():
+        if HAS_CUDA:
             torch.cuda.empty_cache()
-        elif (
-            hasattr(torch, "mps")
-            and hasattr(torch.mps, "empty_cache")
-            and hasattr(torch.backends, "mps")
-            and torch.backends.mps.is_available()
-        ):
+        elif HAS_MPS and hasattr(torch, "mps") and hasattr(torch.mps, "empty_cache"):
             torch.mps.empty_cache()
 
+    def _clear_host_cache(self):
+        """Hand pinned blocks freed by dropped parked models back to the OS."""
+        gc.collect()
+        # Pinned memory is cached by torch's host allocator, which
+        # torch.cuda.empty_cache() doesn't touch
+        if HAS_CUDA and hasattr(torch._C, "_host_emptyCache"):
+            torch._C._host_emptyCache()
+
     def _cleanup_loop(self):
         """Background loop that unloads idle models."""
         while not self._stop_cleanup.wait(self._cleanup_interval_s):
-            unloaded: list[str] = []
             now = time.monotonic()
-            with self._model_lock:
-                unloaded = self._unload_idle_models_locked(now)
+            unloaded, dropped = self._unload_idle_models(now)
             if unloaded:
                 self._clear_device_cache()
                 logger.info(
@@ -173,22 +406,63 @@ class TTSManager:
                     self._idle_timeout_s,
                     ", ".join(unloaded),
                 )
+            if dropped:
+                self._clear_host_cache()
+                logger.info(
+                    "Dropped models parked in host memory for %ss: %s",
+                    self._idle_timeout_s,
+                    ", ".join(dropped),
+                )
 
-    def _unload_idle_models_locked(self, now: float) -> list[str]:
-        if self._idle_timeout_s <= 0 or not self._models:
-            return []
+    def _unload_idle_models(self, now: float) -> Tuple[List[str], List[str]]:
+        """Park or drop models idle on the device, and drop models parked too long.
 
-        cutoff = now - self._idle_timeout_s
-        stale_keys = [
-            key
-            for key, last_used in self._last_used.items()
-            if key in self._models and last_used <= cutoff
-        ]
-        for key in stale_keys:
-            del self._models[key]
-            self._last_used.pop(key, None)
-        return stale_keys
+        Pinned host memory can't be swapped, so a parked model gets another
+        idle timeout to be used again before its host copy is freed as well.
+        Returns the keys unloaded from the device and the parked keys dropped.
+        """
+        if self._idle_timeout_s <= 0 or not (self._models or self._offloaded):
+            return [], []
 
+        cutoff = now - self._idle_timeout_s
+        with self._locks_lock:
+            candidates = [
+                (key, self._key_locks[key])
+                for key, last_used in list(self._last_used.items())
+                if (key in self._models or key in self._offloaded) and last_used <= cutoff
+            ]
+
+        unloaded, dropped = [], []
+        for key, lock in candidates:
+            # A held lock means the model is being fetched right now, so not idle
+            if not lock.acquire(blocking=False):
+                continue
+            try:
+                if self._last_used.get(key, now) > cutoff:
+                    continue
+                if key in self._models:
+                    self._park_or_drop_locked(key, now)
+                    unloaded.append(key)
+                elif self._offloaded.pop(key, None) is not None:
+                    self._last_used.pop(key, None)
+                    dropped.append(key)
+            finally:
+                lock.release()
+        return unloaded, dropped
+
+    def _park_or_drop_locked(self, key: str, now: float):
+        """Offload one idle model to host memory, or drop it."""
+        model = self._models.pop(key)
+        self._last_used.pop(key, None)
+        if HAS_CUDA and not (getattr(model, "_quantized", False) or getattr(model, "_compiled", False)):
+            # Park the weights on the host so the next request skips the reload.
+            # Quantized tensor subclasses can't be pinned, and captured CUDA
+            # graphs hold the old weight addresses, so those are dropped.
+            self._offload_to_host(model)
+            self._offloaded[key] = model
+            self._last_used[key] = now  # Starts the parked timeout
+
+    @_on_graph_thread
     def generate_voice_design(
         self,
         text: str,
@@ -207,13 +481,15 @@ class TTSManager:
             Tuple of (audio_array, sample_rate)
         """
         model = self._get_model("voice_design")
-        wavs, sr = model.generate_voice_design(
-            text=text,
-            language=language if language != "Auto" else "Auto",
-            instruct=instruct,
-        )
+        with torch.inference_mode():
+            wavs, sr = model.generate_voice_design(
+                text=text,
+                language=language,
+                instruct=instruct,
+            )
         return wavs[0], sr
 
+    @_on_graph_thread
     def generate_voice_clone(
         self,
         text: str,
@@ -240,15 +516,17 @@ class TTSManager:
         model_key = f"base_{model_size}"
         model = self._get_model(model_key)
 
-        wavs, sr = model.generate_voice_clone(
-            text=text,
-            language=language if language != "Auto" else "Auto",
-            ref_audio=ref_audio,
-            ref_text=ref_text if not x_vector_only else None,
-            x_vector_only_mode=x_vector_only,
-        )
+        with torch.inference_mode():
+            wavs, sr = model.generate_voice_clone(
+                text=text,
+                language=language,
+                ref_audio=ref_audio,
+                ref_text=ref_text if not x_vector_only else None,
+                x_vector_only_mode=x_vector_only,
+            )
         return wavs[0], sr
 
+    @_on_graph_thread
     def generate_custom_voice(
         self,
         text: str,
@@ -275,36 +553,90 @@ class TTSManager:
 
         kwargs = {
             "text": text,
-            "language": language if language != "Auto" else "Auto",
+            "language": language,
             "speaker": speaker,
         }
         if instruct:
             kwargs["instruct"] = instruct
 
-        wavs, sr = model.generate_custom_voice(**kwargs)
+        with torch.inference_mode():
+            wavs, sr = model.generate_custom_voice(**kwargs)
         return wavs[0], sr
 
-    def unload_model(self, model_key: str):
-        """Unload a specific model to free memory."""
+    @_on_graph_thread
+    def generate_custom_voice_batch(
+        self,
+        texts: List[str],
+        languages: List[str],
+        speakers: List[str],
+        instructs: List[Optional[str]],
+        model_size: str = "1.7B",
+    ) -> Tuple[List[np.ndarray], int]:
+        """
+        Generate several custom voice utterances in one batched forward pass.
+
+        Args:
+            texts: Texts to synthesize
+            languages: Target language per text
+            speakers: Speaker name per text
+            instructs: Optional style instruction per text
+            model_size: "0.6B" or "1.7B"
+
+        Returns:
+            Tuple of (list of audio arrays in input order, sample_rate)
+        """
+        model_key = f"custom_{model_size}"
+        model = self._get_model(model_key)
+
+        kwargs = {
+            "text": list(texts),
+            "language": list(languages),
+            "speaker": list(speakers),
+        }
+        if any(instructs):
+            kwargs["instruct"] = [instruct or "" for instruct in instructs]
+
+        with torch.inference_mode():
+            wavs, sr = model.generate_custom_voice(**kwargs)
+        return list(wavs), sr
+
+    def unload_model(self, model_key: str, release_cache: bool = False):
+        """Unload a specific model.
+
+        Emptying the CUDA cache synchronises the whole device, so by default the
+        freed blocks stay with the caching allocator for the next load. Pass
+        ``release_cache=True`` to hand the memory back to the driver.
+        """
         unloaded = False
-        with self._model_lock:
-            if model_key in self._models:
-                del self._models[model_key]
+        with self._key_lock(model_key):
+            if model_key in self._models or model_key in self._offloaded:
+                self._models.pop(model_key, None)
+                self._offloaded.pop(model_key, None)
                 self._last_used.pop(model_key, None)
                 unloaded = True
         if unloaded:
-            self._clear_device_cache()
+            if release_cache:
+                self._clear_device_cache()
             logger.info(f"Unloaded model: {model_key}")
 
-    def unload_all(self):
-        """Unload all models."""
+    def unload_all(self, release_cache: bool = False):
+        """Unload all models; see ``unload_model`` for ``release_cache``."""
         had_models = False
-        with self._model_lock:
-            had_models = bool(self._models)
-            self._models.clear()
-            self._last_used.clear()
+        with self._locks_lock:
+            locks = list(self._key_locks.values())
+            for lock in locks:
+                lock.acquire()
+            try:
+                had_models = bool(self._models or self._offloaded)
+                self._models.clear()
+                self._offloaded.clear()
+                self._last_used.clear()
+            finally:
+                for lock in locks:
+                    lock.release()
         if had_models:
-            self._clear_device_cache()
+            if release_cache:
+                self._clear_device_cache()
             logger.info("Unloaded all models")
 
     def shutdown(self):
@@ -312,7 +644,9 @@ class TTSManager:
         self._stop_cleanup.set()
         if self._cleanup_thread and self._cleanup_thread.is_alive():
             self._cleanup_thread.join(timeout=2.0)
-        self.unload_all()
+        if self._graph_executor is not None:
+            self._graph_executor.shutdown(wait=False, cancel_futures=True)
+        self.unload_all(release_cache=True)
 
 
 # Global singleton instance
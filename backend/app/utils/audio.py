@@ -3,14 +3,21 @@
 import io
 import logging
 import os
+import shutil
+import struct
 import subprocess
 import tempfile
+from typing import BinaryIO, Iterator
 
 import numpy as np
 import soundfile as sf
 
 logger = logging.getLogger(__name__)
 
+WAV_HEADER_SIZE = 44
+WAV_STREAM_CHUNK_FRAMES = 32768  # 64 KiB of mono PCM16 per chunk
+UPLOAD_COPY_CHUNK_BYTES = 64 * 1024
+
 
 def _convert_to_wav(input_path: str) -> str:
     """Convert arbitrary audio file to WAV using ffmpeg."""
@@ -51,25 +58,43 @@ def _convert_to_wav(input_path: str) -> str:
     return wav_path
 
 
-def load_audio_with_fallback(input_path: str) -> tuple[np.ndarray, int]:
-    """Load audio with soundfile, falling back to ffmpeg decode if needed."""
+def load_audio_with_fallback(source: BinaryIO, suffix: str = ".tmp") -> tuple[np.ndarray, int]:
+    """Decode an audio file object as float32 with soundfile, falling back to ffmpeg if needed.
+
+    ``source`` is read in place (e.g. an upload's spooled temp file), so the
+    body is never materialised as a separate bytes object. Only the ffmpeg
+    fallback (e.g. m4a/webm) copies it out to a named file.
+    """
+    source.seek(0)
     try:
-        return sf.read(input_path)
+        return sf.read(source, dtype="float32", always_2d=False)
     except sf.LibsndfileError:
-        logger.info("soundfile failed to read audio; attempting ffmpeg decode: %s", input_path)
+        logger.info("soundfile failed to read audio; attempting ffmpeg decode (%s)", suffix)
+
+    source.seek(0)
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+        shutil.copyfileobj(source, tmp, UPLOAD_COPY_CHUNK_BYTES)
+        input_path = tmp.name
+    try:
         wav_path = _convert_to_wav(input_path)
         try:
-            return sf.read(wav_path)
+            return sf.read(wav_path, dtype="float32", always_2d=False)
         finally:
             try:
                 os.unlink(wav_path)
             except OSError:
                 pass
+    finally:
+        try:
+            os.unlink(input_path)
+        except OSError:
+            pass
 
 
 def audio_to_wav_bytes(audio: np.ndarray, sample_rate: int) -> bytes:
+    # Pin PCM16 explicitly so the wire format never depends on soundfile defaults
     buffer = io.BytesIO()
-    sf.write(buffer, audio, sample_rate, format="WAV")
+    sf.write(buffer, audio, sample_rate, format="WAV", subtype="PCM_16")
     return buffer.getvalue()
 
 
@@ -77,3 +102,47 @@ def serialize_audio(audio: np.ndarray, sample_rate: int) -> tuple[bytes, float,
     wav_bytes = audio_to_wav_bytes(audio, sample_rate)
     duration = len(audio) / sample_rate if sample_rate else 0.0
     return wav_bytes, duration, sample_rate
+
+
+def wav_header(num_frames: int, sample_rate: int, channels: int = 1) -> bytes:
+    """Build a 44-byte RIFF/WAVE header for PCM16 audio of known length."""
+    block_align = channels * 2
+    data_size = num_frames * block_align
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF",
+        WAV_HEADER_SIZE - 8 + data_size,
+        b"WAVE",
+        b"fmt ",
+        16,
+        1,  # PCM
+        channels,
+        sample_rate,
+        sample_rate * block_align,
+        block_align,
+        16,
+        b"data",
+        data_size,
+    )
+
+
+def wav_stream(audio: np.ndarray, sample_rate: int) -> Iterator[bytes]:
+    """Yield a PCM16 WAV file chunk by chunk without buffering the whole body."""
+    num_frames = audio.shape[0]
+    channels = 1 if audio.ndim == 1 else audio.shape[1]
+    yield wav_header(num_frames, sample_rate, channels)
+
+    scratch = np.empty(min(num_frames, WAV_STREAM_CHUNK_FRAMES) * channels, dtype=np.float32)
+    for start in range(0, num_frames, WAV_STREAM_CHUNK_FRAMES):
+        chunk = audio[start:start + WAV_STREAM_CHUNK_FRAMES].reshape(-1)
+        out = scratch[:chunk.shape[0]]
+        np.clip(chunk, -1.0, 1.0, out=out)
+        np.multiply(out, 32767.0, out=out)
+        np.rint(out, out=out)
+        yield out.astype("<i2").tobytes()
+
+
+def wav_stream_size(audio: np.ndarray) -> int:
+    """Total byte size of the WAV produced by ``wav_stream``."""
+    channels = 1 if audio.ndim == 1 else audio.shape[1]
+    return WAV_HEADER_SIZE + audio.shape[0] * channels * 2
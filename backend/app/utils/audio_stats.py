@@ -0,0 +1,97 @@
+"""Single-pass audio level statistics and in-place normalisation.
+
+Uses Numba kernels when numba is installed and falls back to numpy otherwise.
+Both paths replace non-finite samples with zero.
+"""
+
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Every fast-math flag except nnan/ninf, which would let LLVM fold the
+# isfinite checks away. The kernels stay serial: buffers are a few MB at most,
+# and Numba's default workqueue threading layer aborts if parallel kernels are
+# entered from more than one thread at once, which request workers do.
+_FASTMATH = {"nsz", "arcp", "contract", "afn", "reassoc"}
+
+try:
+    from numba import njit
+
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+if HAS_NUMBA:
+
+    @njit(cache=True, fastmath=_FASTMATH)
+    def _scan_kernel(a):
+        n = a.shape[0]
+        bad = 0
+        peak = 0.0
+        ssq = 0.0
+        for i in range(n):
+            v = a[i]
+            if not np.isfinite(v):
+                bad += 1
+                v = 0.0
+                a[i] = 0.0
+            av = abs(v)
+            peak = max(peak, av)
+            ssq += v * v
+        return bad, peak, (ssq / n) ** 0.5 if n else 0.0
+
+    @njit(cache=True, fastmath=_FASTMATH)
+    def _normalize_clip_kernel(a, scale):
+        n = a.shape[0]
+        peak = 0.0
+        ssq = 0.0
+        for i in range(n):
+            v = min(max(a[i] * scale, -1.0), 1.0)
+            a[i] = v
+            peak = max(peak, abs(v))
+            ssq += v * v
+        return peak, (ssq / n) ** 0.5 if n else 0.0
+
+
+def scan(a: np.ndarray) -> tuple[bool, float, float]:
+    """Zero non-finite samples in place and return ``(had_non_finite, peak, rms)``."""
+    if HAS_NUMBA:
+        bad, peak, rms = _scan_kernel(a)
+        return bad > 0, float(peak), float(rms)
+
+    bad = not np.isfinite(a).all()
+    if bad:
+        np.nan_to_num(a, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+    return bad, *_peak_rms(a)
+
+
+def normalize_clip(a: np.ndarray, scale: float) -> tuple[float, float]:
+    """Scale ``a`` in place, clip to [-1, 1] and return the new ``(peak, rms)``."""
+    if HAS_NUMBA:
+        peak, rms = _normalize_clip_kernel(a, np.float32(scale))
+        return float(peak), float(rms)
+
+    np.multiply(a, scale, out=a)
+    np.clip(a, -1.0, 1.0, out=a)
+    return _peak_rms(a)
+
+
+def _peak_rms(a: np.ndarray) -> tuple[float, float]:
+    if a.shape[0] == 0:
+        return 0.0, 0.0
+    peak = max(float(a.max()), -float(a.min()))
+    rms = float(np.sqrt(np.dot(a, a) / a.shape[0]))
+    return peak, rms
+
+
+def warmup():
+    """Compile (or load from cache) the kernels for float32 input."""
+    if not HAS_NUMBA:
+        return
+    sample = np.zeros(1, dtype=np.float32)
+    scan(sample)
+    normalize_clip(sample, 1.0)
+    logger.info("Audio stats kernels ready")
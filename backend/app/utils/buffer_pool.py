@@ -0,0 +1,67 @@
+"""Reusable float32 scratch buffers for per-request audio preprocessing."""
+
+import logging
+import queue
+
+import numpy as np
+
+from app.config import AUDIO_POOL_BUFFERS, AUDIO_POOL_MAX_SAMPLES
+
+logger = logging.getLogger(__name__)
+
+
+class Float32Pool:
+    """LIFO pool of preallocated float32 buffers.
+
+    ``acquire(n)`` returns a length-``n`` view into a pooled buffer. Requests
+    larger than ``max_samples`` (or made while the pool is drained) fall back
+    to a fresh allocation, which ``release`` then simply drops.
+    """
+
+    def __init__(self, max_samples: int, size: int):
+        self._max_samples = max_samples
+        self._size = size
+        self._buffers: queue.LifoQueue[np.ndarray] = queue.LifoQueue(maxsize=size)
+
+    def preallocate(self):
+        """Fill the pool up to its configured size."""
+        allocated = 0
+        while not self._buffers.full():
+            try:
+                self._buffers.put_nowait(np.empty((self._max_samples,), dtype=np.float32))
+            except queue.Full:
+                break
+            allocated += 1
+        if allocated:
+            logger.info(
+                "Preallocated %d float32 buffers of %d samples",
+                allocated,
+                self._max_samples,
+            )
+
+    def acquire(self, n: int) -> np.ndarray:
+        """Get a float32 buffer of exactly ``n`` samples."""
+        if n <= self._max_samples:
+            try:
+                return self._buffers.get_nowait()[:n]
+            except queue.Empty:
+                pass
+        return np.empty((n,), dtype=np.float32)
+
+    def release(self, buf: np.ndarray):
+        """Return a buffer to the pool; anything that can't be pooled is dropped."""
+        base = buf if buf.base is None else buf.base
+        if (
+            not isinstance(base, np.ndarray)
+            or base.dtype != np.float32
+            or base.shape != (self._max_samples,)
+        ):
+            return
+        try:
+            self._buffers.put_nowait(base)
+        except queue.Full:
+            pass
+
+
+# Global pool for transcription preprocessing (30s of 16kHz audio per buffer)
+float32_pool = Float32Pool(AUDIO_POOL_MAX_SAMPLES, AUDIO_POOL_BUFFERS)
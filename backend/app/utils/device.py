@@ -0,0 +1,61 @@
+"""Compute device capabilities, probed once at import."""
+
+import os
+from functools import lru_cache
+from importlib.metadata import PackageNotFoundError, version
+from typing import Optional
+
+# Read by the CUDA caching allocator on first use, so it must be set before any
+# allocation. Expandable segments let models be moved off and back onto the GPU
+# without fresh cudaMalloc calls or fragmentation.
+os.environ.setdefault("PYTORCH_CUDA_ALLOC_CONF", "expandable_segments:True,max_split_size_mb:512")
+
+import torch
+
+from app.config import WARMUP_ON_LOAD
+
+# torch.cuda also reports AMD GPUs on ROCm builds
+HAS_CUDA = torch.cuda.is_available()
+HAS_ROCM = HAS_CUDA and getattr(torch.version, "hip", None) is not None
+HAS_MPS = hasattr(torch.backends, "mps") and torch.backends.mps.is_available()
+
+DEVICE = "cuda:0" if HAS_CUDA else ("mps" if HAS_MPS else "cpu")
+
+# Load-time warm-up pays for autotuning and kernel JIT up front, which only
+# CUDA has; elsewhere it just delays the first request unless asked for
+SHOULD_WARMUP = HAS_CUDA if WARMUP_ON_LOAD is None else WARMUP_ON_LOAD
+
+
+@lru_cache(maxsize=None)
+def detect_attn_impl() -> Optional[str]:
+    """Pick the attention implementation for HF models on ``DEVICE`` (probed once).
+
+    Hopper GPUs on PyTorch >= 2.2 already get FlashAttention-2 kernels through
+    SDPA, so the flash_attn wheel is only preferred on older GPUs.
+    """
+    if DEVICE == "cpu":
+        return None
+    if HAS_CUDA and not HAS_ROCM and torch.cuda.get_device_capability()[0] >= 9:
+        torch_version = tuple(int(part) for part in torch.__version__.split(".")[:2])
+        if torch_version >= (2, 2) and torch.backends.cuda.flash_sdp_enabled():
+            return "sdpa"
+    try:
+        import flash_attn  # noqa: F401
+        return "flash_attention_2"
+    except ImportError:
+        return "sdpa"  # Fallback to scaled dot product attention
+
+
+@lru_cache(maxsize=None)
+def hf_dtype_kwarg() -> str:
+    """Name of the dtype argument for HF ``from_pretrained`` (probed once).
+
+    transformers 4.56 renamed ``torch_dtype`` to ``dtype``. The loaders here
+    take ``**kwargs``, so the installed version is checked rather than a
+    signature.
+    """
+    try:
+        major, minor = (int(part) for part in version("transformers").split(".")[:2])
+    except (PackageNotFoundError, ValueError):
+        return "torch_dtype"
+    return "dtype" if (major, minor) >= (4, 56) else "torch_dtype"
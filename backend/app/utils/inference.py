@@ -1,15 +1,90 @@
 import asyncio
-from typing import Any, Callable
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Sequence
 
 from app.config import MAX_CONCURRENCY, REQUEST_TIMEOUT_S
 
 _semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+_loop: asyncio.AbstractEventLoop | None = None  # The server loop that owns _semaphore
 
 
 async def run_inference(callable_fn: Callable[..., Any], *args: Any, timeout: int | None = None, **kwargs: Any) -> Any:
-    async with _semaphore:
-        job = asyncio.to_thread(callable_fn, *args, **kwargs)
-        effective_timeout = REQUEST_TIMEOUT_S if timeout is None else timeout
-        if effective_timeout and effective_timeout > 0:
-            return await asyncio.wait_for(job, timeout=effective_timeout)
-        return await job
+    await _semaphore.acquire()
+    job = asyncio.ensure_future(asyncio.to_thread(callable_fn, *args, **kwargs))
+    # A worker thread can't be interrupted, so the slot is freed when the thread
+    # finishes rather than when the caller stops waiting (timeout, cancellation);
+    # otherwise abandoned jobs would run alongside new ones past MAX_CONCURRENCY.
+    job.add_done_callback(_release_slot)
+    return await _await_job(job, timeout)
+
+
+async def run_blocking(callable_fn: Callable[..., Any], *args: Any, timeout: int | None = None, **kwargs: Any) -> Any:
+    """Like ``run_inference``, but without holding a concurrency slot for the whole call.
+
+    For callables that take a slot with ``inference_slot()`` around just their
+    model work, so requests can queue up behind it and be batched together.
+    """
+    global _loop
+    _loop = asyncio.get_running_loop()
+    job = asyncio.ensure_future(asyncio.to_thread(callable_fn, *args, **kwargs))
+    return await _await_job(job, timeout)
+
+
+@contextmanager
+def inference_slot() -> Iterator[None]:
+    """Hold one MAX_CONCURRENCY slot from a worker thread (blocking).
+
+    Runs unguarded when no request has come through ``run_blocking`` yet,
+    e.g. during startup preloading.
+    """
+    loop = _loop
+    if loop is None or not loop.is_running():
+        yield
+        return
+    asyncio.run_coroutine_threadsafe(_semaphore.acquire(), loop).result()
+    try:
+        yield
+    finally:
+        loop.call_soon_threadsafe(_semaphore.release)
+
+
+async def _await_job(job: asyncio.Future, timeout: int | None) -> Any:
+    effective_timeout = REQUEST_TIMEOUT_S if timeout is None else timeout
+    if effective_timeout and effective_timeout > 0:
+        return await asyncio.wait_for(asyncio.shield(job), timeout=effective_timeout)
+    return await asyncio.shield(job)
+
+
+def _release_slot(job: asyncio.Future) -> None:
+    _semaphore.release()
+    if not job.cancelled():
+        job.exception()  # Mark as retrieved when nobody is waiting any more
+
+
+async def iter_prefetched(
+    jobs: Sequence[Callable[[], Awaitable[Any]]],
+    should_continue: Callable[[], Awaitable[bool]] | None = None,
+) -> AsyncIterator[Any]:
+    """Await ``jobs`` in order, starting each one as soon as the previous finishes.
+
+    Job ``i + 1`` is already running while the caller handles result ``i``, so
+    generating the next segment overlaps encoding and sending the current one.
+    ``should_continue`` is checked before each prefetch so no new job starts
+    once it returns False. Stopping early abandons the job in flight; its
+    worker thread runs to completion and holds its concurrency slot until then.
+    """
+    pending: asyncio.Future | None = None
+    try:
+        for index in range(len(jobs)):
+            if pending is None:
+                pending = asyncio.ensure_future(jobs[index]())
+            result = await pending
+            pending = None
+            if index + 1 < len(jobs) and (should_continue is None or await should_continue()):
+                pending = asyncio.ensure_future(jobs[index + 1]())
+            yield result
+            if pending is None:
+                return
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()